@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark File
+
+Purpose: The purpose of this module is to time every stage of the pipeline
+without touching the network, so a slow change can be caught and the counting
+modes can be compared on the same data.
+
+A bucket of synthetic GLM files is written with SyntheticGLM, with the flashes
+clustered around the hurricane Ana line used by main.py, and read back through
+a LocalBucket. Each mode is then run in its own python process, so its peak
+memory is its own, and every stage is timed:
+
+    planDownloads, getGLMData, createFilesInfoDataFrame, merge,
+    processNetCDFs or streamNetCDFs, makeFlashDataFrame, removeData
+
+or, for the async mode, runAsync and makeFlashDataFrame.
+
+The modes are:
+    serial - processNetCDFs() in one process
+    parallel - processNetCDFs(parallel=True) on a process pool
+    per-flash - processNetCDFs() with the storm located at every flash
+    stream - streamNetCDFs() downloading to disk
+    in-memory - streamNetCDFs(inMemory=True)
+    async - runAsync(), listing, downloading and counting at the same time
+
+For every stage the seconds, files/s and flashes/s are printed, with the peak
+resident memory of each mode. Run it from src/:
+
+    python benchmark.py --files 540 --flashes 300
+    python benchmark.py --modes serial parallel --json results.json
+    python benchmark.py --modes stream async --latency 0.05
+
+--latency makes every listing and fetch of the bucket wait as long as a round
+trip to S3, which is what the overlapping modes hide.
+
+The synthetic files are written to a temporary directory that is removed at
+the end unless --keep is given.
+
+Created on Sun Oct 18 2026
+
+@author: coreywalker
+"""
+
+import os
+import io
+import sys
+import json
+import asyncio
+import argparse
+import shutil
+import tempfile
+import resource
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+from timeit import default_timer as timer
+
+#the hurricane Ana line of main.py
+stormStart = datetime(2021, 5, 20)
+stormPoints = (30.30, -55.50, 30.86, -55.11)
+stormHours = 3
+
+modes = ['serial', 'parallel', 'per-flash', 'stream', 'in-memory', 'async']
+
+
+def buildDriver(bucketDir, latency=0.0):
+    """
+
+
+    Parameters
+    ----------
+    bucketDir : Str
+        The directory of the synthetic bucket.
+    latency : Float
+        The seconds every request to the bucket waits. Default is 0.
+
+    Returns
+    -------
+    Driver
+        A driver interpolated along the storm line of main.py, reading from
+        a LocalBucket of bucketDir.
+
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from class_driver import Driver
+    from class_bucket import LocalBucket
+
+    obj = Driver()
+    obj.bucket = LocalBucket(bucketDir, latency=latency)
+    obj.calculateDistance(*stormPoints)
+    obj.calculateSpeedPerHour(stormHours)
+    obj.calculate20SecondDistance()
+    obj.getNpointsForInterpolation()
+    obj.interpolateLatLons()
+    obj.createInterpolatedTimeStamps(stormStart.year, stormStart.month, stormStart.day, 0, 0, 0)
+    obj.createDownloadStartStopString()
+    obj.createDownloadList()
+
+    return obj
+
+
+def runMode(mode, bucketDir, latency=0.0):
+    """
+
+
+    Parameters
+    ----------
+    mode : Str
+        One of modes.
+    bucketDir : Str
+        The directory of the synthetic bucket.
+    latency : Float
+        The seconds every request to the bucket waits. Default is 0.
+
+    Returns
+    -------
+    Dictionary
+        The seconds of every stage of the mode keyed by stage name, the
+        number of files counted under 'files' and the peak resident memory
+        in MB under 'peakMB'. The output of the pipeline itself is hidden.
+
+    """
+    obj = buildDriver(bucketDir, latency)
+    stages = []
+
+    def stage(name, function, *args, **kwargs):
+        start = timer()
+        with redirect_stdout(io.StringIO()):
+            function(*args, **kwargs)
+        stages.append((name, timer() - start))
+
+    if mode == 'async':
+        #runAsync lists the buckets itself
+        stage('runAsync', lambda: asyncio.run(obj.runAsync()))
+        stage('makeFlashDataFrame', obj.makeFlashDataFrame)
+    elif mode in ['stream', 'in-memory']:
+        stage('planDownloads', obj.planDownloads)
+        stage('streamNetCDFs', obj.streamNetCDFs, inMemory=mode == 'in-memory')
+        stage('makeFlashDataFrame', obj.makeFlashDataFrame)
+    else:
+        stage('planDownloads', obj.planDownloads)
+        obj.setPerFlashTiming(mode == 'per-flash')
+        stage('getGLMData', obj.getGLMData)
+        stage('createFilesInfoDataFrame', obj.createFilesInfoDataFrame)
+        stage('merge', obj.merge)
+        stage('processNetCDFs', obj.processNetCDFs, parallel=mode == 'parallel')
+        stage('makeFlashDataFrame', obj.makeFlashDataFrame)
+        stage('removeData', obj.removeData)
+
+    #ru_maxrss is in kB on Linux, the pool workers are counted as children
+    peakKB = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+    return {'stages': stages, 'files': len(obj.processedDataFrame), 'peakMB': peakKB / 1024}
+
+
+def main():
+    """
+
+
+    Returns
+    -------
+    Str
+        Writes the synthetic bucket, runs every mode asked for in a process of
+        its own and prints the table of stage timings. With --json the
+        results are saved as well, to compare against a later run.
+
+    """
+    parser = argparse.ArgumentParser(description='Time every stage of the pipeline on synthetic GLM files.')
+    parser.add_argument('--files', type=int, default=540, help='number of GLM files, 540 is three hours')
+    parser.add_argument('--flashes', type=int, default=300, help='mean number of flashes per file')
+    parser.add_argument('--spread', type=float, default=3.0, help='degrees the storm flashes spread around the track')
+    parser.add_argument('--clustered', type=float, default=0.8, help='share of the flashes clustered around the track')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds every request to the bucket waits, ex: 0.05 for S3')
+    parser.add_argument('--modes', nargs='+', default=modes, choices=modes, help='modes to run')
+    parser.add_argument('--json', help='file to save the results to')
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic files and the outputs of every mode')
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--bucket', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        #a child process runs one mode and hands its result back as json
+        print(json.dumps(runMode(args.mode, args.bucket, args.latency)))
+        return
+
+    from class_synthetic import SyntheticGLM
+
+    workDir = tempfile.mkdtemp(prefix='glm-benchmark-')
+    bucketDir = os.path.join(workDir, 'bucket')
+
+    #the storm flashes sit on the middle of the track
+    midLat = (stormPoints[0] + stormPoints[2]) / 2
+    midLon = (stormPoints[1] + stormPoints[3]) / 2
+
+    start = timer()
+    synthetic = SyntheticGLM(bucketDir)
+    synthetic.makeFiles(stormStart, args.files, args.flashes, clusters=[(midLat, midLon)], spread=args.spread, clustered=args.clustered)
+    print('Wrote {} synthetic files with {} flashes in {:.2f} s to {}'.format(args.files, synthetic.nFlashes, timer() - start, workDir))
+    print('\n')
+
+    results = {}
+    for mode in args.modes:
+        #a fresh directory per mode, the data directory is taken from the working directory
+        modeDir = os.path.join(workDir, mode)
+        os.makedirs(modeDir)
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--mode', mode, '--bucket', bucketDir, '--latency', str(args.latency)],
+                                cwd=modeDir, env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__))),
+                                stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+        results[mode] = json.loads(output.strip().split('\n')[-1])
+
+    print('{:<10} {:<26} {:>9} {:>10} {:>12}'.format('mode', 'stage', 'seconds', 'files/s', 'flashes/s'))
+    for mode, result in results.items():
+        for name, seconds in result['stages']:
+            print('{:<10} {:<26} {:>9.3f} {:>10.1f} {:>12.0f}'.format(
+                mode, name, seconds, result['files'] / max(seconds, 1e-9), synthetic.nFlashes / max(seconds, 1e-9)))
+        total = sum(seconds for name, seconds in result['stages'])
+        print('{:<10} {:<26} {:>9.3f} {:>10.1f} {:>12.0f}   peak {:.0f} MB'.format(
+            mode, 'total', total, result['files'] / max(total, 1e-9), synthetic.nFlashes / max(total, 1e-9), result['peakMB']))
+        print('')
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump({'files': args.files, 'flashes': synthetic.nFlashes, 'latency': args.latency, 'results': results}, f, indent=2)
+
+    if not args.keep:
+        shutil.rmtree(workDir)
+
+
+if __name__ == '__main__':
+    main()
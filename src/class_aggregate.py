@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Aggregate File
+
+Purpose: This class keeps the time-binned flash counts of a run up to date as
+each scan is counted, so the 1, 5, 15 and 60 minute series, the rolling flash
+rate and the lightning jumps of a long run are there at the end without
+building the per-scan dataframe and resampling it.
+
+Every scan adds its flash count to the open bin of each bin size. When a scan
+falls past the end of a bin the bin is closed and kept as one (flashes, scans)
+pair, so the memory grows with the number of bins, not the number of files.
+Rates are in flashes per minute, normalized by the scans in the bin, so a bin
+missing a file is not read as a drop in activity.
+
+Each closed 1 minute rate goes into a ring buffer of the last window minutes,
+and their mean is kept as the rolling rate of the minute. Lightning jumps
+follow the 2 sigma algorithm: the rate of change of the jumpMinutes rate
+(DFRDT) is compared to the standard deviation of the history values before
+it, and a jump is recorded when it exceeds jumpSigma of them while the rate is
+at least minRate. A gap in the scans starts the history again.
+
+Scans must be added in time order, which is how the Driver hands them over:
+
+    obj.aggregator = Aggregator()
+    obj.processNetCDFs()
+    obj.aggregator.dataFrame(5)
+    obj.aggregator.jumpDataFrame()
+
+Methods:
+    __init__()
+    add()
+    dataFrame()
+    jumpDataFrame()
+
+For a list of method descriptions:
+    help(Aggregator)
+
+@author: coreywalker
+"""
+
+import numpy as np
+import pandas as pd
+from collections import deque
+
+#the seconds one GLM file covers
+scanSeconds = 20
+
+
+class Aggregator():
+
+    def __init__(self, binMinutes=(1, 5, 15, 60), window=10, jumpMinutes=2, history=5, jumpSigma=2.0, minRate=10.0):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        binMinutes : Tuple
+            The bin sizes in minutes kept for the run. Default is (1, 5, 15, 60).
+        window : Int
+            The number of 1 minute rates averaged into the rolling rate.
+            Default is 10.
+        jumpMinutes : Int
+            The bin size in minutes of the rate jumps are found in. Default is 2.
+        history : Int
+            The number of earlier rate changes the standard deviation of a jump
+            is taken over. Default is 5, ten minutes of 2 minute bins.
+        jumpSigma : Float
+            The number of standard deviations a rate change must exceed to be
+            a jump. Default is 2.0.
+        minRate : Float
+            The least flashes per minute a jump is recorded at. Default is 10.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.binMinutes = sorted(set(binMinutes) | {1, jumpMinutes}) #every bin size kept, in minutes
+        self.window = window #1 minute rates in the rolling rate
+        self.jumpMinutes = jumpMinutes #bin size of the jump rates
+        self.jumpSigma = jumpSigma #standard deviations of a jump
+        self.minRate = minRate #least rate of a jump
+        self.open = {} #the [start, flashes, scans] of the open bin keyed by bin size
+        self.closed = {minutes: {} for minutes in self.binMinutes} #(flashes, scans) of every closed bin keyed by bin size and start in ns
+        self.rates = deque(maxlen=window) #ring buffer of the last 1 minute rates
+        self.rolling = {} #the rolling rate of every closed minute keyed by start in ns
+        self.changes = deque(maxlen=history) #ring buffer of the last rate changes
+        self.lastRate = None #the start in ns and rate of the last closed jump bin
+        self.jumps = [] #a (start, rate, change, sigma) tuple per jump
+        self.lastTime = None #the time of the last scan added, in ns
+
+    def add(self, time, flashCount):
+        """
+
+
+        Parameters
+        ----------
+        time : Timestamp
+            The scan time.
+        flashCount : Int
+            The flashes counted for the scan.
+
+        Returns
+        -------
+        Self.
+            Adds the count to the open bin of every size, closing the bins the
+            scan has moved past first.
+
+        """
+        ns = pd.Timestamp(time).value
+        if self.lastTime is not None and ns < self.lastTime:
+            raise ValueError('Scans must be added in time order, {} is before {}'.format(pd.Timestamp(time), pd.Timestamp(self.lastTime)))
+        self.lastTime = ns
+
+        for minutes in self.binMinutes:
+            start = ns - ns % (minutes * 60 * 10**9)
+            current = self.open.get(minutes)
+            if current is not None and current[0] != start:
+                self._close(minutes, current)
+                current = None
+            if current is None:
+                current = self.open[minutes] = [start, 0, 0]
+            current[1] += flashCount
+            current[2] += 1
+
+    def dataFrame(self, minutes=1):
+        """
+
+
+        Parameters
+        ----------
+        minutes : Int
+            One of the bin sizes. Default is 1.
+
+        Returns
+        -------
+        Pandas DataFrame
+            One row per bin with the Bin Start, Flash Count, Scans and the Flash
+            Rate in flashes per minute. The 1 minute bins have a Rolling Rate
+            column as well. The open bin is included with the scans it has so far.
+
+        """
+        bins = dict(self.closed[minutes])
+        if minutes in self.open:
+            start, flashes, scans = self.open[minutes]
+            bins[start] = (flashes, scans)
+
+        starts = sorted(bins)
+        df = pd.DataFrame({'Bin Start': pd.to_datetime(np.array(starts, dtype='int64')),
+                           'Flash Count': [bins[start][0] for start in starts],
+                           'Scans': [bins[start][1] for start in starts]})
+        df['Flash Rate'] = df['Flash Count'] / (df['Scans'] * scanSeconds / 60)
+        if minutes == 1:
+            df['Rolling Rate'] = [self.rolling.get(start, np.nan) for start in starts]
+
+        return df
+
+    def jumpDataFrame(self):
+        """
+
+
+        Returns
+        -------
+        Pandas DataFrame
+            One row per lightning jump with the Bin Start of the jump bin, its
+            Flash Rate, the Rate Change in flashes per minute per minute and the
+            Sigma of the changes before it.
+
+        """
+        return pd.DataFrame({'Bin Start': pd.to_datetime(np.array([jump[0] for jump in self.jumps], dtype='int64')),
+                             'Flash Rate': [jump[1] for jump in self.jumps],
+                             'Rate Change': [jump[2] for jump in self.jumps],
+                             'Sigma': [jump[3] for jump in self.jumps]})
+
+    def _close(self, minutes, current):
+        """
+
+
+        Parameters
+        ----------
+        minutes : Int
+            The bin size.
+        current : List
+            The [start, flashes, scans] of the bin to close.
+
+        Returns
+        -------
+        Self.
+            Keeps the bin, and updates the rolling rate for 1 minute bins and
+            the jump test for jumpMinutes bins.
+
+        """
+        start, flashes, scans = current
+        self.closed[minutes][start] = (flashes, scans)
+        rate = flashes / (scans * scanSeconds / 60)
+
+        if minutes == 1:
+            self.rates.append(rate)
+            self.rolling[start] = sum(self.rates) / len(self.rates)
+
+        if minutes == self.jumpMinutes:
+            if self.lastRate is not None and start - self.lastRate[0] != minutes * 60 * 10**9:
+                #a gap in the scans, the rates before it say nothing about this one
+                self.changes.clear()
+                self.lastRate = None
+            if self.lastRate is not None:
+                change = (rate - self.lastRate[1]) / minutes
+                if len(self.changes) == self.changes.maxlen:
+                    sigma = float(np.std(self.changes))
+                    if rate >= self.minRate and change > self.jumpSigma * sigma:
+                        self.jumps.append((start, rate, change, sigma))
+                self.changes.append(change)
+            self.lastRate = (start, rate)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Bounds File
+
+Purpose: This class keeps a small sidecar index of where the flashes of every
+GLM file lie. The first time a file is read its number of flashes and the
+minimum and maximum flash_lat and flash_lon are appended as one JSON line to
+the index file. On every later run the counting code looks the file up first,
+and a file whose flashes cannot reach any storm box is never downloaded,
+opened or read again.
+
+The index is append only, so several processes can add to it at once and an
+interrupted run loses at most the line being written.
+
+Methods:
+    __init__()
+    load()
+    get()
+    put()
+
+For a list of method descriptions:
+    help(BoundsIndex)
+
+@author: coreywalker
+"""
+
+import os
+import json
+import numpy as np
+
+
+class BoundsIndex():
+
+    def __init__(self, indexFile=os.getcwd() + '/cache/bounds.jsonl'):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        indexFile : Str
+            The JSON lines file holding one line per GLM file. Default is
+            ./cache/bounds.jsonl
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.indexFile = indexFile #the sidecar file the bounds are appended to
+        self.bounds = {} #(nFlashes, minLat, maxLat, minLon, maxLon) keyed by GLM file name
+        os.makedirs(os.path.dirname(os.path.abspath(self.indexFile)), exist_ok=True)
+        self.load()
+
+    def load(self):
+        """
+
+
+        Returns
+        -------
+        Dictionary
+            Reads every line of self.indexFile into self.bounds. Lines cut
+            short by an interrupted run are ignored.
+
+        """
+        if not os.path.exists(self.indexFile):
+            return
+
+        with open(self.indexFile) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.bounds[entry['file']] = tuple(entry['bounds'])
+
+    def get(self, fileName):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key.
+
+        Returns
+        -------
+        Tuple
+            The (nFlashes, minLat, maxLat, minLon, maxLon) of the file, or None
+            if the file has not been read yet.
+
+        """
+        return self.bounds.get(os.path.basename(fileName))
+
+    def put(self, fileName, flashLats, flashLons):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key.
+        flashLats : numpy array
+            The flash_lat array of the file.
+        flashLons : numpy array
+            The flash_lon array of the file.
+
+        Returns
+        -------
+        Tuple
+            Appends the bounds of the flashes to the index and returns them. A
+            file with no valid flashes is stored with nan bounds.
+
+        """
+        valid = ~(np.isnan(flashLats) | np.isnan(flashLons))
+        if valid.any():
+            lats, lons = flashLats[valid], flashLons[valid]
+            bounds = (int(valid.sum()), float(lats.min()), float(lats.max()), float(lons.min()), float(lons.max()))
+        else:
+            bounds = (0, np.nan, np.nan, np.nan, np.nan)
+
+        name = os.path.basename(fileName)
+        self.bounds[name] = bounds
+
+        #one short write per line keeps appends from several processes whole
+        with open(self.indexFile, 'a') as f:
+            f.write(json.dumps({'file': name, 'bounds': bounds}) + '\n')
+
+        return bounds
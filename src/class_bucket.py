@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Bucket File
+
+Purpose:
+    These classes list and fetch GLM netCDFs from an object store without
+    shelling out to the AWS CLI. S3Bucket talks to the public NOAA buckets over
+    anonymous HTTPS, reusing one connection per download thread, and
+    LocalBucket serves the same interface from a plain directory so the
+    download code can run with no network. Bucket is abstract: a subclass
+    that does not define listObjects() and getObject() cannot be created.
+
+    Downloads are spread over a bounded pool of threads, retried with
+    exponential backoff, and files already present with the right size are
+    skipped so an interrupted download can simply be run again.
+
+Methods:
+    Bucket
+        __init__()
+        listObjects()
+        getObject()
+        downloadObject()
+        downloadObjects()
+    S3Bucket(Bucket)
+        __init__()
+        listObjects()
+        getObject()
+    LocalBucket(Bucket)
+        __init__()
+        listObjects()
+        getObject()
+
+For a list of method descriptions:
+    help(S3Bucket)
+
+@author: coreywalker
+"""
+
+import os
+import abc
+import time
+import threading
+import http.client
+import xml.etree.ElementTree as ET
+from urllib.parse import urlencode, urlsplit, quote
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Bucket(abc.ABC):
+
+    def __init__(self, retries=5, backoff=0.5):
+        """
+        constructor containing the retry attributes shared by every bucket.
+
+        Parameters
+        ----------
+        retries : Int
+            The number of times a failed request is attempted again. Default is 5.
+        backoff : Float
+            The number of seconds waited before the first retry. The wait doubles
+            on every following retry. Default is 0.5.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.retries = retries #number of retries for a failed request
+        self.backoff = backoff #seconds to wait before the first retry
+
+    @abc.abstractmethod
+    def listObjects(self, prefix):
+        """
+
+
+        Parameters
+        ----------
+        prefix : Str
+            The key prefix to list, ex:
+                GLM-L2-LCFA/2021/140/00/
+
+        Returns
+        -------
+        List
+            A list of (key, size) tuples for every object under the prefix.
+            Every bucket must define it.
+
+        """
+
+    @abc.abstractmethod
+    def getObject(self, key):
+        """
+
+
+        Parameters
+        ----------
+        key : Str
+            The key of the object to fetch.
+
+        Returns
+        -------
+        Bytes
+            The content of the object. Every bucket must define it.
+
+        """
+
+    def downloadObject(self, key, size, destDir):
+        """
+
+
+        Parameters
+        ----------
+        key : Str
+            The key of the object to download.
+        size : Int
+            The size of the object in bytes, as returned by .listObjects()
+        destDir : Str
+            The directory the file is written to.
+
+        Returns
+        -------
+        Int
+            The number of bytes written, or 0 if a file of the right size was
+            already present and the download was skipped.
+
+        """
+        fileName = os.path.join(destDir, os.path.basename(key))
+
+        #resume: a complete file from an earlier run does not need fetching
+        if os.path.exists(fileName) and os.path.getsize(fileName) == size:
+            return 0
+
+        data = self.getObject(key)
+
+        #write to a temporary name so a crash never leaves a partial .nc behind
+        tmpName = fileName + '.part'
+        with open(tmpName, 'wb') as f:
+            f.write(data)
+        os.replace(tmpName, fileName)
+
+        return len(data)
+
+    def downloadObjects(self, objects, destDir, workers=16):
+        """
+
+
+        Parameters
+        ----------
+        objects : List
+            A list of (key, size) tuples as returned by .listObjects()
+        destDir : Str
+            The directory the files are written to.
+        workers : Int
+            The maximum number of concurrent transfers. Default is 16.
+
+        Returns
+        -------
+        Tuple
+            The (number of files downloaded, number of files skipped, bytes
+            downloaded) for the call.
+
+        """
+        os.makedirs(destDir, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda obj: self.downloadObject(obj[0], obj[1], destDir), objects))
+
+        nSkipped = sum(1 for nBytes in results if nBytes == 0)
+
+        return (len(results) - nSkipped, nSkipped, sum(results))
+
+    def _retry(self, request):
+        """
+
+
+        Parameters
+        ----------
+        request : Function
+            A function taking no arguments that performs one attempt of a
+            request.
+
+        Returns
+        -------
+        The return value of request, after retrying with exponential backoff
+        on connection errors.
+
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return request()
+            except FileNotFoundError:
+                #a missing object will not appear by asking again
+                raise
+            except (OSError, http.client.HTTPException):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+class S3Bucket(Bucket):
+
+    def __init__(self, bucketName, endpoint=None, retries=5, backoff=0.5):
+        """
+        constructor containing the connection attributes for the bucket.
+
+        Parameters
+        ----------
+        bucketName : Str
+            The name of the bucket, ex:
+                noaa-goes16
+        endpoint : Str
+            An optional endpoint url such as http://localhost:5000 for a local
+            S3 stand-in. Requests to an endpoint use path style addressing.
+            Default is None, which uses https://<bucketName>.s3.amazonaws.com
+        retries : Int
+            The number of times a failed request is attempted again. Default is 5.
+        backoff : Float
+            The number of seconds waited before the first retry. Default is 0.5.
+
+        Returns
+        -------
+        Self.
+
+        """
+        Bucket.__init__(self, retries, backoff)
+        self.bucketName = bucketName #name of the bucket
+
+        if endpoint is None:
+            endpoint = 'https://{}.s3.amazonaws.com'.format(bucketName)
+            self.basePath = ''
+        else:
+            self.basePath = '/' + bucketName
+
+        url = urlsplit(endpoint)
+        self.scheme = url.scheme #http or https
+        self.host = url.netloc #host and port of the endpoint
+        self.local = threading.local() #holds one reused connection per thread
+
+    def listObjects(self, prefix):
+        """
+
+
+        Parameters
+        ----------
+        prefix : Str
+            The key prefix to list, ex:
+                GLM-L2-LCFA/2021/140/00/
+
+        Returns
+        -------
+        List
+            A list of (key, size) tuples for every object under the prefix.
+
+        """
+        objects = []
+        token = None
+
+        #ListObjectsV2 returns at most 1000 keys per page
+        while True:
+            params = {'list-type': 2, 'prefix': prefix}
+            if token is not None:
+                params['continuation-token'] = token
+            body = self._request(self.basePath + '/?' + urlencode(params))
+
+            root = ET.fromstring(body)
+            for element in root.iter():
+                #drop the xml namespace from the tag
+                element.tag = element.tag.split('}')[-1]
+
+            for content in root.iter('Contents'):
+                objects.append((content.findtext('Key'), int(content.findtext('Size'))))
+
+            if root.findtext('IsTruncated') != 'true':
+                break
+            token = root.findtext('NextContinuationToken')
+
+        return objects
+
+    def getObject(self, key):
+        """
+
+
+        Parameters
+        ----------
+        key : Str
+            The key of the object to fetch.
+
+        Returns
+        -------
+        Bytes
+            The content of the object.
+
+        """
+        return self._request(self.basePath + '/' + quote(key))
+
+    def _connection(self):
+        """
+
+
+        Returns
+        -------
+        http.client Connection
+            The connection of the calling thread, opened on first use and kept
+            alive for every following request.
+
+        """
+        if getattr(self.local, 'connection', None) is None:
+            if self.scheme == 'https':
+                self.local.connection = http.client.HTTPSConnection(self.host, timeout=60)
+            else:
+                self.local.connection = http.client.HTTPConnection(self.host, timeout=60)
+
+        return self.local.connection
+
+    def _request(self, path):
+        """
+
+
+        Parameters
+        ----------
+        path : Str
+            The path and query string of the GET request.
+
+        Returns
+        -------
+        Bytes
+            The body of the response.
+
+        """
+        def attempt():
+            connection = self._connection()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                #the connection is unusable after an error, open a new one next try
+                connection.close()
+                self.local.connection = None
+                raise
+
+            if response.status >= 500:
+                raise http.client.HTTPException('{} returned {}'.format(path, response.status))
+            if response.status != 200:
+                raise FileNotFoundError('{} returned {}'.format(path, response.status))
+
+            return body
+
+        return self._retry(attempt)
+
+
+class LocalBucket(Bucket):
+
+    def __init__(self, rootDir, retries=5, backoff=0.5, latency=0.0):
+        """
+        constructor for a bucket stored as a plain directory.
+
+        Parameters
+        ----------
+        rootDir : Str
+            The directory standing in for the bucket. Keys are paths relative
+            to this directory.
+        retries : Int
+            The number of times a failed request is attempted again. Default is 5.
+        backoff : Float
+            The number of seconds waited before the first retry. Default is 0.5.
+        latency : Float
+            The number of seconds every listing and fetch waits before it is
+            answered, standing in for the round trip to S3 so the overlap of
+            downloads and counting can be measured offline. Default is 0.
+
+        Returns
+        -------
+        Self.
+
+        """
+        Bucket.__init__(self, retries, backoff)
+        self.rootDir = rootDir #directory holding the objects
+        self.latency = latency #seconds each request waits, as if it went over the network
+
+    def listObjects(self, prefix):
+        """
+
+
+        Parameters
+        ----------
+        prefix : Str
+            The key prefix to list, ex:
+                GLM-L2-LCFA/2021/140/00/
+
+        Returns
+        -------
+        List
+            A list of (key, size) tuples for every object under the prefix.
+
+        """
+        time.sleep(self.latency)
+        objects = []
+        for root, dirs, files in os.walk(os.path.join(self.rootDir, prefix)):
+            for f in files:
+                fileName = os.path.join(root, f)
+                key = os.path.relpath(fileName, self.rootDir).replace(os.sep, '/')
+                objects.append((key, os.path.getsize(fileName)))
+
+        return sorted(objects)
+
+    def getObject(self, key):
+        """
+
+
+        Parameters
+        ----------
+        key : Str
+            The key of the object to fetch.
+
+        Returns
+        -------
+        Bytes
+            The content of the object.
+
+        """
+        def attempt():
+            time.sleep(self.latency)
+            with open(os.path.join(self.rootDir, key), 'rb') as f:
+                return f.read()
+
+        return self._retry(attempt)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Cache File
+
+Purpose: This class keeps the decoded flash arrays of every GLM file that has
+been processed, so a storm can be rerun with a different box size or time
+window without downloading or decoding the same netCDFs again. Each GLM file
+is stored as one .npz file named after the GLM object, holding flash_lat,
+flash_lon, flash_time_offset_of_first_event, flash_energy and flash_area.
+
+The cache is bounded in size. Every hit refreshes the modification time of the
+entry, and when the cache grows past maxBytes the least recently used entries
+are removed first. The size is kept as a running total, counted once when the
+cache is opened, so the directory is only listed when an eviction is due.
+
+Methods:
+    __init__()
+    entryPath()
+    fileNames()
+    get()
+    put()
+    evict()
+
+For a list of method descriptions:
+    help(FlashCache)
+
+@author: coreywalker
+"""
+
+import os
+import numpy as np
+
+
+class FlashCache():
+
+    def __init__(self, cacheDir=os.getcwd() + '/cache/', maxBytes=2e9):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        cacheDir : Str
+            The directory holding the cached .npz files. Default is ./cache/
+        maxBytes : Float
+            The largest size the cache may grow to before the least recently
+            used entries are removed. Default is 2e9, or 2 GB.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.cacheDir = cacheDir #directory holding one .npz per GLM file
+        self.maxBytes = maxBytes #size limit of the cache in bytes
+        os.makedirs(self.cacheDir, exist_ok=True)
+        self.totalBytes = sum(size for mtime, size, path in self._entries()) #running size of the cache in bytes
+
+    def entryPath(self, fileName):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key.
+
+        Returns
+        -------
+        Str
+            The path of the cache entry for the GLM object.
+
+        """
+        return os.path.join(self.cacheDir, os.path.basename(fileName) + '.npz')
+
+    def fileNames(self):
+        """
+
+
+        Returns
+        -------
+        Set
+            The names of every GLM file with an entry in the cache, listed with
+            a single pass over the cache directory.
+
+        """
+        return set(entry.name[:-len('.npz')] for entry in os.scandir(self.cacheDir) if entry.name.endswith('.npz'))
+
+    def get(self, fileName):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key.
+
+        Returns
+        -------
+        Dictionary
+            The cached flash arrays keyed by variable name, or None if the
+            GLM object is not cached.
+
+        """
+        path = self.entryPath(fileName)
+        try:
+            with np.load(path) as entry:
+                flashes = {name: entry[name] for name in entry.files}
+        except (FileNotFoundError, ValueError, OSError):
+            #missing, or evicted or half written by another process
+            return None
+
+        #mark the entry as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return flashes
+
+    def put(self, fileName, flashes):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key.
+        flashes : Dictionary
+            The decoded flash arrays keyed by variable name.
+
+        Returns
+        -------
+        Cache Entry
+            Writes the arrays to the cache and evicts old entries if the cache
+            is over its size limit.
+
+        """
+        path = self.entryPath(fileName)
+
+        #write to a temporary name so readers never see a partial entry
+        tmpPath = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmpPath, 'wb') as f:
+            np.savez(f, **flashes)
+        size = os.path.getsize(tmpPath)
+        try:
+            #an entry written again replaces the old one
+            size -= os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmpPath, path)
+
+        self.totalBytes += size
+        if self.totalBytes > self.maxBytes:
+            self.evict()
+
+    def evict(self):
+        """
+
+
+        Returns
+        -------
+        Smaller Cache
+            Removes the least recently used entries until the cache is no
+            larger than self.maxBytes. The directory is listed again so
+            entries added or removed by other processes are counted.
+
+        """
+        entries = self._entries()
+        totalBytes = sum(size for mtime, size, path in entries)
+
+        for mtime, size, path in sorted(entries):
+            if totalBytes <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            totalBytes -= size
+
+        self.totalBytes = totalBytes
+
+    def _entries(self):
+        """
+
+
+        Returns
+        -------
+        List
+            The (mtime, size, path) of every entry in the cache, listed with a
+            single pass over the cache directory.
+
+        """
+        entries = []
+        for entry in os.scandir(self.cacheDir):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Catalog File
+
+Purpose: This class keeps a SQLite catalog of the GLM files in the data
+directory, so the directory is not walked and every file name is not parsed
+again on every run. Each row holds the file name, its creation, scan begin and
+scan end times in nanoseconds and its size in bytes, with a covering index on
+the scan begin time so a time range is looked up without reading the table.
+
+The catalog is updated incrementally. When the modification time of the data
+directory has not changed since the last update nothing is listed at all,
+otherwise only the names that appeared are parsed, with one vectorized
+pd.to_datetime call per time column, and the names that disappeared are
+removed.
+
+Functions:
+    parseFileTimes()
+
+Classes:
+    Catalog
+        __init__()
+        update()
+        lookup()
+        count()
+
+For a list of method descriptions:
+    help(Catalog)
+
+@author: coreywalker
+"""
+
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+#where each time sits at the end of a GLM file name, ex:
+#OR_GLM-L2-LCFA_G16_s20211400000000_e20211400000200_c20211400000227.nc
+timeSlices = {'File Creation Time': (-17, -3),
+              'File Scan Begin Time': (-49, -35),
+              'File Scan End Time': (-33, -19)}
+
+
+def parseFileTimes(fileNames):
+    """
+
+
+    Parameters
+    ----------
+    fileNames : List
+        A list of GLM file names, paths or S3 keys.
+
+    Returns
+    -------
+    Pandas DataFrame
+        A DataFrame with the file name, file creation time, scan begin time,
+        scan end time and scan time delta of every file, in the order given.
+        Each time column is parsed from its slice of the names with a single
+        pd.to_datetime call.
+
+    """
+    names = pd.Series(list(fileNames), dtype=object)
+
+    filesDataFrame = pd.DataFrame()
+    filesDataFrame['File Name'] = names
+    for column, (start, stop) in timeSlices.items():
+        filesDataFrame[column] = pd.to_datetime(names.str.slice(start, stop), format='%Y%j%H%M%S%f').astype('datetime64[ns]')
+    filesDataFrame['Scan Time Delta'] = filesDataFrame['File Scan End Time'] - filesDataFrame['File Scan Begin Time']
+
+    return filesDataFrame
+
+
+class Catalog():
+
+    def __init__(self, dataDir, catalogFile=None):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        dataDir : Str
+            The directory holding the GLM netCDF files.
+        catalogFile : Str
+            The SQLite file of the catalog. It is kept outside of dataDir, as
+            writing it would change the modification time of the directory.
+            Default is None, which keeps the catalog next to the directory,
+            ex: ./data.catalog.sqlite for ./data/
+
+        Returns
+        -------
+        Self.
+
+        """
+        os.makedirs(dataDir, exist_ok=True)
+        self.dataDir = dataDir #directory holding the GLM files
+        self.catalogFile = catalogFile if catalogFile is not None else os.path.normpath(dataDir) + '.catalog.sqlite' #the SQLite file
+        self.connection = sqlite3.connect(self.catalogFile) #open connection to the catalog
+
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, creation INTEGER, '
+                                    'begin INTEGER, end INTEGER, size INTEGER)')
+            #the index holds every column a lookup returns, so the table itself is never read
+            self.connection.execute('CREATE INDEX IF NOT EXISTS filesBegin ON files (begin, end, creation, name)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+
+    def update(self):
+        """
+
+
+        Returns
+        -------
+        Tuple
+            Brings the catalog up to date with the data directory and returns
+            the (number of files added, number of files removed). Only .nc
+            files are kept, so partial downloads are never catalogued.
+
+        """
+        dirTime = os.stat(self.dataDir).st_mtime_ns
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'dirTime'").fetchone()
+        if row is not None and row[0] == dirTime:
+            #no file was added or removed since the last update
+            return (0, 0)
+
+        onDisk = {}
+        for entry in os.scandir(self.dataDir):
+            if entry.name.endswith('.nc') and entry.is_file():
+                onDisk[entry.name] = entry
+
+        catalogued = set(name for name, in self.connection.execute('SELECT name FROM files'))
+        added = [name for name in onDisk if name not in catalogued]
+        removed = [name for name in catalogued if name not in onDisk]
+
+        rows = []
+        if added:
+            times = parseFileTimes(added)
+            columns = [times[column].values.astype('int64').tolist() for column in timeSlices]
+            sizes = [onDisk[name].stat().st_size for name in added]
+            rows = zip(added, *columns, sizes)
+
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)', rows)
+            self.connection.executemany('DELETE FROM files WHERE name = ?', [(name,) for name in removed])
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('dirTime', ?)", (dirTime,))
+
+        return (len(added), len(removed))
+
+    def lookup(self, start=None, end=None):
+        """
+
+
+        Parameters
+        ----------
+        start : Timestamp
+            The earliest scan begin time to return. Default is None, no limit.
+        end : Timestamp
+            The latest scan begin time to return. Default is None, no limit.
+
+        Returns
+        -------
+        Pandas DataFrame
+            The files with a scan begin time between start and end, sorted by
+            the scan begin time, with the same columns as Data.parseFileNames()
+            and the full path in the File Name column.
+
+        """
+        lower = pd.Timestamp(start).value if start is not None else np.iinfo('int64').min
+        upper = pd.Timestamp(end).value if end is not None else np.iinfo('int64').max
+
+        rows = self.connection.execute('SELECT name, creation, begin, end FROM files WHERE begin BETWEEN ? AND ? '
+                                       'ORDER BY begin', (int(lower), int(upper))).fetchall()
+        names, creation, begin, finish = zip(*rows) if rows else ((), (), (), ())
+
+        filesDataFrame = pd.DataFrame()
+        prefix = os.path.join(self.dataDir, '')
+        filesDataFrame['File Name'] = [prefix + name for name in names]
+        filesDataFrame['File Creation Time'] = np.array(creation, dtype='int64').astype('datetime64[ns]')
+        filesDataFrame['File Scan Begin Time'] = np.array(begin, dtype='int64').astype('datetime64[ns]')
+        filesDataFrame['File Scan End Time'] = np.array(finish, dtype='int64').astype('datetime64[ns]')
+        filesDataFrame['Scan Time Delta'] = filesDataFrame['File Scan End Time'] - filesDataFrame['File Scan Begin Time']
+
+        return filesDataFrame
+
+    def count(self):
+        """
+
+
+        Returns
+        -------
+        Int
+            The number of files in the catalog.
+
+        """
+        return self.connection.execute('SELECT COUNT(*) FROM files').fetchone()[0]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Checkpoint File
+
+Purpose: This class records the progress of a storm run so a run that crashes
+or is stopped can be started again without redoing the work already done.
+Every GLM file that is counted is appended to a JSON lines log together with
+its results, the moment it is counted. A restarted Driver restores those
+results from the log and neither downloads nor opens the files again.
+
+The storm track and the count settings of the run (geometry, size, radii,
+rings and per-flash timing) are written to the log as well. When a run is
+started for another storm or with different settings the counts in the log no
+longer apply and every file is counted again.
+
+Methods:
+    __init__()
+    load()
+    useSettings()
+    countedResults()
+    recordCount()
+
+For a list of method descriptions:
+    help(Checkpoint)
+
+@author: coreywalker
+"""
+
+import os
+import json
+import threading
+import pandas as pd
+
+
+class Checkpoint():
+
+    def __init__(self, checkpointFile=os.getcwd() + '/checkpoint.jsonl'):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        checkpointFile : Str
+            The JSON lines log of the run. Default is ./checkpoint.jsonl
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.checkpointFile = checkpointFile #the log the progress is appended to
+        self.settings = None #the count settings the results in the log were made with
+        self.counted = {} #the results of every counted file keyed by GLM file name
+        self.lock = threading.Lock() #keeps lines written from several threads whole
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpointFile)), exist_ok=True)
+        self.load()
+
+    def load(self):
+        """
+
+
+        Returns
+        -------
+        Dictionary
+            Reads the log into self.settings and self.counted. Results made
+            before the last change of settings are dropped, and a last line cut
+            short by a crash is ignored.
+
+        """
+        if not os.path.exists(self.checkpointFile):
+            return
+
+        with open(self.checkpointFile) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry['stage'] == 'settings':
+                    self.settings = entry['settings']
+                    self.counted = {}
+                elif entry['stage'] == 'count':
+                    self.counted[entry['file']] = entry['results']
+
+    def useSettings(self, settings):
+        """
+
+
+        Parameters
+        ----------
+        settings : Dictionary
+            The track and count settings of the run about to start, ex:
+                {'track': '3f2a...', 'geometry': 'degree', 'size': 1, 'radii': None}
+
+        Returns
+        -------
+        Self.
+            Keeps the counts in the log when they were made with the same
+            settings, otherwise forgets them and starts a new section of the
+            log.
+
+        """
+        #compare the settings the way they read back from the log
+        settings = json.loads(json.dumps(settings))
+        if settings == self.settings:
+            return
+
+        if self.counted:
+            print('The storm or count settings changed, {} checkpointed files will be counted again.'.format(len(self.counted)))
+        self.settings = settings
+        self.counted = {}
+        self._append({'stage': 'settings', 'settings': settings})
+
+    def countedResults(self, fileName):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key.
+
+        Returns
+        -------
+        List
+            The (time, lat, lon, flashCount, extraColumns) results of the file
+            as returned by countFlashesForFile(), or None if the file has not
+            been counted.
+
+        """
+        results = self.counted.get(os.path.basename(fileName))
+        if results is None:
+            return None
+
+        return [(pd.Timestamp(time), lat, lon, flashCount, extraColumns) for time, lat, lon, flashCount, extraColumns in results]
+
+    def recordCount(self, fileName, results):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key.
+        results : List
+            The (time, lat, lon, flashCount, extraColumns) results of the file.
+
+        Returns
+        -------
+        Log Line
+            Appends the results of the file to the log.
+
+        """
+        name = os.path.basename(fileName)
+        results = [[pd.Timestamp(time).value, float(lat), float(lon), int(flashCount), extraColumns]
+                   for time, lat, lon, flashCount, extraColumns in results]
+        self.counted[name] = results
+        self._append({'stage': 'count', 'file': name, 'results': results})
+
+    def _append(self, entry):
+        """
+
+
+        Parameters
+        ----------
+        entry : Dictionary
+            One line of the log.
+
+        Returns
+        -------
+        Log Line
+            Appends the entry to the log and closes the file so the line is on
+            disk before the run carries on.
+
+        """
+        with self.lock:
+            with open(self.checkpointFile, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
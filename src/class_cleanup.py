@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Cleanup File
+
+Purpose: This class removes downloaded GLM files from the data directory in
+one pass inside python, instead of starting an rm process for every file. The
+directory is listed once with os.scandir, the files to keep are picked by
+their scan begin times and sizes, and everything else is unlinked. Only .nc
+files are ever removed. A Catalog of the directory notices the removed files
+the next time it is updated.
+
+Retention policies can be combined:
+    keepHours - keep the files scanned within this many hours of the newest
+        file in the directory.
+    maxBytes - keep the newest files up to this many bytes.
+    keepCached - keep every file that has an entry in a FlashCache.
+With no policy every GLM file is removed.
+
+Methods:
+    __init__()
+    listFiles()
+    plan()
+    remove()
+
+For a list of method descriptions:
+    help(Cleanup)
+
+@author: coreywalker
+"""
+
+import os
+import numpy as np
+from datetime import datetime, timedelta
+
+#the scan begin time at the end of a GLM file name, ex: s20211400000000
+scanBeginSlice = slice(-49, -35)
+scanTimeFormat = '%Y%j%H%M%S'
+
+
+class Cleanup():
+
+    def __init__(self, dataDir, cache=None):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        dataDir : Str
+            The directory holding the downloaded GLM files.
+        cache : FlashCache
+            The cache checked by the keepCached policy. Default is None.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.dataDir = dataDir #directory holding the GLM files
+        self.cache = cache #FlashCache whose files can be kept
+
+    def listFiles(self):
+        """
+
+
+        Returns
+        -------
+        Tuple of numpy arrays
+            The (names, sizes) of every .nc file in self.dataDir, newest scan
+            first. GLM scan times are written as YYYYjjjHHMMSSt, so sorting the
+            time part of the names as text sorts the files by time.
+
+        """
+        names = []
+        sizes = []
+        if os.path.isdir(self.dataDir):
+            for entry in os.scandir(self.dataDir):
+                if entry.name.endswith('.nc') and entry.is_file():
+                    try:
+                        sizes.append(entry.stat().st_size)
+                    except FileNotFoundError:
+                        continue
+                    names.append(entry.name)
+
+        names = np.array(names, dtype=object)
+        sizes = np.array(sizes, dtype='int64')
+        order = np.argsort(np.array([name[scanBeginSlice] for name in names], dtype=str), kind='stable')[::-1]
+
+        return names[order], sizes[order]
+
+    def plan(self, keepHours=None, maxBytes=None, keepCached=False):
+        """
+
+
+        Parameters
+        ----------
+        keepHours : Float
+            Keep the files scanned within this many hours of the newest file.
+            Default is None, no time policy.
+        maxBytes : Float
+            Keep the newest files up to this many bytes. Default is None, no
+            size policy.
+        keepCached : Bool
+            If True the files with an entry in self.cache are kept. Default is
+            False.
+
+        Returns
+        -------
+        Tuple of numpy arrays
+            The (paths, sizes) of the files the policies do not keep.
+
+        """
+        names, sizes = self.listFiles()
+        if len(names) == 0:
+            return names, sizes
+
+        keep = np.zeros(len(names), dtype=bool)
+        if keepHours is not None or maxBytes is not None:
+            keep[:] = True
+            if keepHours is not None:
+                #compare the names as text against the cutoff written the same way
+                newest = names[0][scanBeginSlice]
+                cutoff = datetime.strptime(newest[:-1], scanTimeFormat) - timedelta(hours=keepHours)
+                cutoff = cutoff.strftime(scanTimeFormat) + newest[-1]
+                keep &= np.array([name[scanBeginSlice] >= cutoff for name in names])
+            if maxBytes is not None:
+                keep &= np.cumsum(np.where(keep, sizes, 0)) <= maxBytes
+
+        if keepCached and self.cache is not None:
+            cached = self.cache.fileNames()
+            keep |= np.array([name in cached for name in names])
+
+        prefix = os.path.join(self.dataDir, '')
+        paths = np.array([prefix + name for name in names[~keep]], dtype=object)
+
+        return paths, sizes[~keep]
+
+    def remove(self, keepHours=None, maxBytes=None, keepCached=False):
+        """
+
+
+        Parameters
+        ----------
+        keepHours : Float
+            Keep the files scanned within this many hours of the newest file.
+            Default is None.
+        maxBytes : Float
+            Keep the newest files up to this many bytes. Default is None.
+        keepCached : Bool
+            If True the files with an entry in self.cache are kept. Default is
+            False.
+
+        Returns
+        -------
+        Tuple
+            Removes every file the policies do not keep and returns the
+            (number of files removed, bytes freed).
+
+        """
+        paths, sizes = self.plan(keepHours, maxBytes, keepCached)
+
+        nRemoved = 0
+        bytesFreed = 0
+        for path, size in zip(paths, sizes):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                #already removed by another run
+                continue
+            nRemoved += 1
+            bytesFreed += int(size)
+
+        return nRemoved, bytesFreed
@@ -4,16 +4,19 @@
 Class Command File
 
 Purpose:
-    This class is used to generate download strings and interact with a bash shell 
-    to download the NOAA, netCDFs using AWS CLI commands. 
+    This class is used to generate download strings and download the NOAA 
+    netCDFs from AWS S3 with a pool of concurrent transfers. 
     
 Methods:
     __init__()
     printDownloadStartString()
     createDownloadStartStopString()
     createDownloadList()
+    listPrefix()
+    listLookupObjects()
+    planDownloads()
     getGLMData()
-    removeDat()
+    removeData()
     
 For a list of method descriptions:
     help(Command)
@@ -24,9 +27,11 @@ Created on Fri Jul 29 11:59:41 2022
 """
 
 from class_data import Data
-import os
+from class_bucket import S3Bucket
+from class_cleanup import Cleanup
+from timeit import default_timer as timer
+import pandas as pd
 
-dataDir = os.getcwd() + '/data/'
 
 class Command(Data):
     
@@ -43,6 +48,10 @@ class Command(Data):
         self.lookupList = '' #a list of strings to use for data downloads from AWS CLI. 
         self.DownloadStart = '' #a string to use for AWS CLI start download
         self.DownloadEnd = '' #a string to use for AWS CLI end download
+        self.bucket = None #the bucket files are downloaded from. Default is None, which uses the public S3 bucket in self.lookupList. 
+        self.downloadPlan = None #a list of (key, size) tuples of the files to download. Default is None, which downloads every file in self.lookupList. 
+        self.skippedDownloads = 0 #the number of listed files left out of self.downloadPlan
+        self.checkpoint = None #a Checkpoint of the files already counted, which are not downloaded again. Default is None. 
     
     def printDownloadStartStopString(self):
         """
@@ -76,8 +85,8 @@ class Command(Data):
         end = self.interpolatedDataFrame.iloc[-1]['Interpolated TimeStamps']
         
         #set up the variables for the appropriate call format
-        startt = start.timetuple().tm_yday
-        endtt = end.timetuple().tm_yday
+        startt = '{0:03d}'.format(start.timetuple().tm_yday)
+        endtt = '{0:03d}'.format(end.timetuple().tm_yday)
         startYear = start.year
         endYear = end.year
         bucket = 'noaa-goes16'
@@ -99,73 +108,180 @@ class Command(Data):
         -------
         List
             Returns a list of strings representing the AWS buckets containing 
-            the necessary for downloading data automatically. 
+            the necessary for downloading data automatically. There is one bucket 
+            for every hour covered by the storm fixes, so a track 
+            crossing midnight or lasting several days is covered and each hour 
+            is only listed once. 
 
         """
         
-        start = self.interpolatedDataFrame.iloc[0]['Interpolated TimeStamps']
-        
-        startt = start.timetuple().tm_yday
-        startYear = start.year
         bucket = 'noaa-goes16'
         product = 'GLM-L2-LCFA'
-        totalHours = self.hourEnd-self.hourStart+1
-        hourStartObj = self.hourStart
-        hourStartFormatted = '{0:02d}'.format(hourStartObj)
+        
+        #every hour from the first to the last storm fix, in order
+        fixTimes = self.getFixes()[0]
+        oneHour = pd.Timedelta(hours=1)
+        hours = pd.date_range(fixTimes[0].floor(oneHour), (fixTimes[-1] - pd.Timedelta(1)).floor(oneHour), freq=oneHour)
         
         LookupList = []
-        for i in range(totalHours):
-            downloadObj = 's3://{}/{}/{}/{}/{}/'.format(bucket, product, startYear, startt, hourStartFormatted)
+        for hour in hours:
+            downloadObj = 's3://{}/{}/{}/{:03d}/{:02d}/'.format(bucket, product, hour.year, hour.dayofyear, hour.hour)
             LookupList.append(downloadObj)
-            hourStartObj += 1
-            hourStartFormatted = '{0:02d}'.format(hourStartObj)
             
         self.lookupList = LookupList
         
         
-    def getGLMData(self):
+    def listPrefix(self, lookup):
+        """
+        
+
+        Parameters
+        ----------
+        lookup : Str
+            One bucket of self.lookupList, ex:
+                s3://noaa-goes16/GLM-L2-LCFA/2021/140/00/
+
+        Returns
+        -------
+        List
+            A list of (key, size) tuples for every netCDF in the bucket. 
+
+        """
+        print('Listing:', lookup)
+        bucketName, prefix = lookup[len('s3://'):].split('/', 1)
+        if self.bucket is None:
+            self.bucket = S3Bucket(bucketName)
+            
+        return [obj for obj in self.bucket.listObjects(prefix) if obj[0].endswith('.nc')]
+        
+    def listLookupObjects(self):
+        """
+        
+
+        Returns
+        -------
+        List
+            A list of (key, size) tuples for every netCDF in the buckets of 
+            self.lookupList. 
+
+        """
+        objects = []
+        for i in range(len(self.lookupList)):
+            objects += self.listPrefix(self.lookupList[i])
+            
+        return objects
+    
+    def planDownloads(self):
         """
         
 
+        Returns
+        -------
+        List
+            Lists every bucket in self.lookupList and keeps only the files whose 
+            scan midpoint falls between the first and last fix of the storm, as 
+            found by .locateFiles(), which are the only files .merge() would keep. 
+            The (key, size) tuples are stored in self.downloadPlan and used by 
+            .getGLMData(). 
+
+        """
+        self.instrument.start('planDownloads', prefixes=len(self.lookupList))
+        
+        objects = self.listLookupObjects()
+        
+        sizes = dict(objects)
+        
+        #decode the scan times from the keys and match them to the storm track
+        keysDataFrame = self.parseFileNames([obj[0] for obj in objects])
+        needed = self.locateFiles(keysDataFrame)
+        
+        self.downloadPlan = [(key, sizes[key]) for key in needed['File Name']]
+        self.skippedDownloads = len(objects) - len(self.downloadPlan)
+        
+        self.instrument.end('planDownloads', files=len(objects), planned=len(self.downloadPlan))
+        
+        print('Planned {} files for download, skipped {} files that are not on the storm track.'.format(len(self.downloadPlan), self.skippedDownloads))
+        print('\n')
+        
+    def getGLMData(self, workers=16):
+        """
+        
+
+        Parameters
+        ----------
+        workers : Int
+            The maximum number of files transferred at the same time across 
+            all of the buckets in self.lookupList. Default is 16. 
+
         Returns
         -------
         Filled Directory
             Downloads all of the data necessary for the flash analysis based on 
-            the lookup list generated by .createDownloadList()
+            the lookup list generated by .createDownloadList(), or only the files 
+            in self.downloadPlan if .planDownloads() was called. The files are 
+            written to self.filepath. Files already there with the right size are 
+            skipped, and so are the files self.checkpoint holds counts for. 
 
         """
         print('Downloading all data now!')
         print('\n')
         
-        for i in range(len(self.lookupList)):
-            print('Downloading from:', self.lookupList[i])
-            print('\n')
-            
-            os.system('aws s3 cp' + ' ' + self.lookupList[i] + ' ' +dataDir + ' ' + '--no-sign-request' + ' ' +'--recursive')
-            
-            print('\n')
-            print('Done!')
-            
-            print('\n')
+        self.instrument.start('getGLMData', workers=workers)
+        
+        if self.downloadPlan is not None:
+            objects = self.downloadPlan
+        else:
+            #list every prefix first so all of the transfers share one pool
+            objects = self.listLookupObjects()
+        
+        if self.checkpoint is not None:
+            #a file counted before a restart is never needed again
+            nObjects = len(objects)
+            objects = [obj for obj in objects if self.checkpoint.countedResults(obj[0]) is None]
+            print('{} files were already counted and are not downloaded.'.format(nObjects - len(objects)))
+        
+        print('\n')
+        print('Downloading {} files from {} buckets'.format(len(objects), len(self.lookupList)))
+        
+        nDownloaded, nSkipped, nBytes = self.bucket.downloadObjects(objects, self.filepath, workers)
+        
+        self.instrument.end('getGLMData', files=nDownloaded, nBytes=nBytes, present=nSkipped)
+        
+        print('\n')
+        print('Done! Downloaded {} files ({:.1f} MB), {} were already present.'.format(nDownloaded, nBytes / 1e6, nSkipped))
+        print('\n')
     
-    def removeData(self):
+    def removeData(self, keepHours=None, maxBytes=None, keepCached=False):
         """
         
 
+        Parameters
+        ----------
+        keepHours : Float
+            Keep the files scanned within this many hours of the newest file. 
+            Default is None. 
+        maxBytes : Float
+            Keep the newest files up to this many bytes, ex: 5e9 for 5 GB. 
+            Default is None. 
+        keepCached : Bool
+            If True the files with an entry in the FlashCache of the driver are 
+            kept. Default is False. 
+
         Returns
         -------
         Empty Directory
-            Removes all of the files from the datadirectory recursively.
+            Removes the GLM files from self.filepath in one pass, keeping 
+            the files asked for by the retention policies. With no policy every 
+            GLM file is removed. 
 
         """
-        print('Removing {} files now!'.format(len(self.filesDataFrame)))
-        print('\n')
+        #the cache belongs to the Driver, a bare Command has none
+        cleanup = Cleanup(self.filepath, getattr(self, 'cache', None))
+        
+        start = timer()
+        self.instrument.start('removeData')
+        nRemoved, bytesFreed = cleanup.remove(keepHours, maxBytes, keepCached)
+        self.instrument.end('removeData', files=nRemoved, nBytes=bytesFreed)
         
-        for root, dirs, files in os.walk(dataDir):
-            for f in files:
-                file = os.path.join(dataDir, f)
-                os.system('rm' + ' ' + file)
-                print('removing: ' + file + '!')
-                
         print('\n')
-        print('All files are cleared!')
\ No newline at end of file
+        print('Removed {} files in {:.2f} s, freed {:.1f} MB.'.format(nRemoved, timer() - start, bytesFreed / 1e6))
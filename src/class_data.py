@@ -4,6 +4,8 @@
 Class Data File
 
 Purpose: This class is used to observe the data downloaded from AWS CLI. 
+The file metadata is kept in a SQLite Catalog of the data directory. 
+Every stage reports its start and end to the Instrument in self.instrument. 
 
 Methods: 
     
@@ -11,6 +13,7 @@ Methods:
     printDataFilePath() 
     printFilesDataFrame() 
     printNumberFiles() 
+    parseFileNames() 
     createFilesInfoDataFrame() 
     
 For a list of method descriptions:
@@ -23,7 +26,8 @@ Created on Wed Jul 27 14:30:17 2022
 
 import os 
 import pandas as pd
-from datetime import datetime
+from class_catalog import Catalog, parseFileTimes
+from class_instrument import Instrument
 
 
 class Data():
@@ -41,6 +45,8 @@ class Data():
         self.filesDataFrame = pd.DataFrame() #a dataframe that will contain file metadata.
         self.hourStart = 0 #a number representing the hour the storm was at location one. 
         self.hourEnd = 0 #a number representing the hour the storm was at location two. 
+        self.catalog = None #a Catalog of the files in the data directory, opened on first use. 
+        self.instrument = Instrument() #reports the start, end and progress of every stage. Default draws a progress bar only. 
         
     def printDataFilePath(self):
         """
@@ -75,61 +81,67 @@ class Data():
 
         """
         
+        if self.catalog is None:
+            self.catalog = Catalog(self.filepath)
+        
         ##print number of files in folder
-        for root, dirs, files in os.walk(self.filepath):
-            print("The number of file(s) that were downloaded to the data folder are: ", len(files))
-            print('\n')
+        self.catalog.update()
+        print("The number of file(s) that were downloaded to the data folder are: ", self.catalog.count())
+        print('\n')
             
     
-    def createFilesInfoDataFrame(self):
+    def parseFileNames(self, fileNames):
+        """
+        
+
+        Parameters
+        ----------
+        fileNames : List
+            A list of GLM file names, paths or S3 keys. The times are read from 
+            the end of each name, ex:
+                OR_GLM-L2-LCFA_G16_s20211400000000_e20211400000200_c20211400000227.nc
+
+        Returns
+        -------
+        Pandas DataFrame
+            A DataFrame containing the file name, file creation time, begin time of 
+            sattelite scan, end time of sattelite scan and the scan time delta, 
+            sorted by the scan begin time. 
+
+        """
+        #one vectorized parse per time column instead of three strptime calls per file
+        filesDataFrame = parseFileTimes(fileNames)
+        
+        return filesDataFrame.sort_values(by='File Scan Begin Time')
+    
+    def createFilesInfoDataFrame(self, start=None, end=None):
         """
+        
+
+        Parameters
+        ----------
+        start : Timestamp
+            The earliest scan begin time to keep. Default is None, no limit. 
+        end : Timestamp
+            The latest scan begin time to keep. Default is None, no limit. 
 
         Returns
         -------
         Pandas DataFrame 
             Creates a DataFrame of the files metadata that is downloaded from AWS CLI
             containing the file name, file creation time, begin time of sattelite scan, end time of
-            sattelite scan and the scan time delta. 
+            sattelite scan and the scan time delta. The metadata is kept in a Catalog 
+            of the data directory, so only new files are parsed and the time range is 
+            looked up from an index. 
 
         """
-        fileList = [] #list to save the filenames
-        creationList = [] #list to store the file creation times. 
-        scanEndList = [] #list to store the scan end times. 
-        scanBeginList = [] #list to store the scan begin times. 
+        self.instrument.start('createFilesInfoDataFrame')
         
-        ##get the file info
-        for root, dirs, files in os.walk(self.filepath):
-            for f in files:
-                if f == '.DS_Store':
-                    pass
-                else:
-                #filepath
-                    fileName = os.path.join(self.filepath, f)
-                    fileList.append(fileName)
-                
-                #get the file creation time
-                    fileCreationTime = f[-17:-3]
-                    dateTimeCreate = datetime.strptime(fileCreationTime, '%Y%j%H%M%S%f')
-                    creationList.append(dateTimeCreate)
-                
-                #get the scan time 
-                    scanTime = f[-49:-35]
-                    dateTimeScan = datetime.strptime(scanTime, '%Y%j%H%M%S%f')
-                    scanBeginList.append(dateTimeScan)
-                
-                #get the scan end time
-                    endTime = f[-33:-19]
-                    dateTimeEnd = datetime.strptime(endTime, '%Y%j%H%M%S%f')
-                    scanEndList.append(dateTimeEnd)
+        if self.catalog is None:
+            self.catalog = Catalog(self.filepath)
         
-        #create the dataframe containing the apropriate columns
-        self.filesDataFrame['File Name'] = fileList
-        self.filesDataFrame['File Creation Time'] = creationList
-        self.filesDataFrame['File Scan Begin Time'] = scanBeginList
-        self.filesDataFrame['File Scan End Time'] = scanEndList
-        self.filesDataFrame['Scan Time Delta'] = self.filesDataFrame['File Scan End Time'] - self.filesDataFrame['File Scan Begin Time']
-        self.filesDataFrame = self.filesDataFrame.sort_values(by='File Scan Begin Time')
-            
-    
+        #only the files added or removed since the last run are looked at
+        self.catalog.update()
+        self.filesDataFrame = self.catalog.lookup(start, end)
         
-    
\ No newline at end of file
+        self.instrument.end('createFilesInfoDataFrame', files=len(self.filesDataFrame))
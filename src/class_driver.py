@@ -12,11 +12,28 @@ inheritance problem does not occur.
 This class merges the interpolated dataframe with the filesdatframe and uses 
 the merged data to process all of the netcdfs into a dictionary structure. From 
 the dictonary, a flashcount dataframe can be generated and plotted. 
+The progress of the counting is drawn as a bar by self.instrument, which 
+also records the timings, files, bytes and flashes of every stage. 
 
 Methods:
     __init__()
+    setBoxGeometry()
+    setStormRelativeBins()
+    setPerFlashTiming()
+    getLocator()
+    countSettings()
+    getGLMData()
     merge()
+    getHeadings()
+    trackSignature()
+    checkpointSettings()
+    resumeAfterWritten()
+    restoreCounts()
+    handOverCounts()
     processNetCDFs()
+    fetchFile()
+    streamNetCDFs()
+    runAsync()
     makeFlashDataFrame()
     plotFlashesByTime()
     
@@ -26,10 +43,22 @@ For a list of method descriptions:
 @author: coreywalker
 """
 
-from class_interpolate import interpolate
+from class_interpolate import interpolate, interpolatePositions
 from class_command import Command 
+from flash_count import countFlashesForScan, countFlashesForFile, countFlashesInWorker, initWorker, boundsMayReach, geometries, reader
+from class_bucket import S3Bucket
+from class_order import ScanOrder
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import json
+import queue
+import asyncio
+import hashlib
+import threading
+from functools import partial
+from timeit import default_timer as timer
+import numpy as np
 import pandas as pd
-import netCDF4 as nc
 import matplotlib.pyplot as plt
 
 
@@ -48,6 +77,151 @@ class Driver(interpolate, Command):
         self.mergedDataFrame = ''#a dataframe that is the result of merging self.interpolatedDataFrame and self.filesDataFrame. Default is empty. 
         self.dataDictionary = ''#a dictionary to store data returned from each processed netcdf file.
         self.processedDataFrame = pd.DataFrame() #a dataframe containing concatinated data for plotting.
+        self.fileLatencies = pd.DataFrame() #a dataframe of the fetch and count seconds of each streamed file.
+        self.cache = None #a FlashCache of decoded flash arrays checked before any file is opened. Default is None. 
+        self.boundsIndex = None #a BoundsIndex of the flash bounds of files read before, used to skip files far from the storm. Default is None. 
+        self.writer = None #a ResultWriter the counts are appended to as they are made instead of self.dataDictionary. Default is None. 
+        self.aggregator = None #an Aggregator handed every count in scan order for the binned series and lightning jumps. Default is None. 
+        self.geometry = 'degree' #the shape counted around each storm location, one of 'degree', 'km' or 'radius'. 
+        self.boxSize = 1 #the size of the shape, in degrees for 'degree' and km for 'km' and 'radius'. 
+        self.radii = None #a list of great-circle radii in km counted as extra columns. Default is None. 
+        self.rings = None #a list of ring edges in km for storm-relative ring by quadrant columns. Default is None. 
+        self.perFlash = False #if True every flash is tested against the storm center at its own time. Default is False. 
+        
+    def setBoxGeometry(self, geometry='degree', size=1, radii=None):
+        """
+        
+
+        Parameters
+        ----------
+        geometry : Str
+            The shape counted around each interpolated storm location - ex:
+                'degree' = size degrees up, down, left and right, the original box
+                'km' = size km north, south, east and west
+                'radius' = within size km along a great circle
+            Default is 'degree'. 
+        size : Float
+            Degrees for 'degree', km for 'km' and 'radius'. Default is 1. 
+        radii : List
+            Great-circle radii in km counted in the same pass, each added as a 
+            'Flash Count <radius>km' column - ex:
+                [50, 100, 200, 400]
+            Default is None. 
+
+        Returns
+        -------
+        Self.
+            Sets the geometry used by .processNetCDFs() and .streamNetCDFs(). 
+
+        """
+        if geometry not in geometries:
+            raise ValueError('Unknown geometry {}, use one of {}'.format(geometry, geometries))
+        
+        self.geometry = geometry
+        self.boxSize = size
+        self.radii = radii
+        
+    def setStormRelativeBins(self, rings=None):
+        """
+        
+
+        Parameters
+        ----------
+        rings : List
+            Two or more edges of the storm-relative distance rings in km, 
+            strictly increasing - ex:
+                [0, 50, 100, 200, 400]
+            Default is None, which turns the binning off. 
+
+        Returns
+        -------
+        Self.
+            Makes .processNetCDFs() and .streamNetCDFs() bin the flashes of every 
+            scan by ring and by quadrant relative to the storm heading (Front-Right, 
+            Rear-Right, Rear-Left, Front-Left). Each ring and quadrant becomes a 
+            'Flashes <inner>-<outer>km <quadrant>' column of self.processedDataFrame. 
+
+        """
+        if rings is not None and (len(rings) < 2 or np.any(np.diff(rings) <= 0)):
+            raise ValueError('The ring edges must be two or more and strictly increase, got {}'.format(rings))
+        
+        self.rings = rings
+        
+    def setPerFlashTiming(self, perFlash=True):
+        """
+        
+
+        Parameters
+        ----------
+        perFlash : Bool
+            If True the storm is located at the time of every flash, read from 
+            flash_time_offset_of_first_event and time_coverage_start, instead of 
+            once per file at the scan midpoint. Default is True. 
+
+        Returns
+        -------
+        Self.
+            Sets the timing mode of .processNetCDFs() and .streamNetCDFs(). 
+
+        """
+        self.perFlash = perFlash
+        
+    def getLocator(self):
+        """
+        
+
+        Returns
+        -------
+        Function
+            A picklable function turning flash times into storm positions with 
+            the fixes and method of .position(), or None when self.perFlash is 
+            False. 
+
+        """
+        if not self.perFlash:
+            return None
+        
+        fixTimes, fixLats, fixLons = self.getFixes()
+        
+        return partial(interpolatePositions, fixTimes=fixTimes, fixLats=fixLats, fixLons=fixLons, method=self.positionMethod)
+        
+    def countSettings(self):
+        """
+        
+
+        Returns
+        -------
+        Dictionary
+            The cache, geometry, size, radii, rings, locate and index keyword 
+            arguments of countFlashesForFile() for this run. A process pool is 
+            handed them once per worker through initWorker(). 
+
+        """
+        return {'cache': self.cache, 'geometry': self.geometry, 'size': self.boxSize, 'radii': self.radii, 
+                'rings': self.rings, 'locate': self.getLocator(), 'index': self.boundsIndex}
+        
+    def getGLMData(self, workers=16):
+        """
+        
+
+        Parameters
+        ----------
+        workers : Int
+            The maximum number of files transferred at the same time. Default 
+            is 16. 
+
+        Returns
+        -------
+        Filled Directory
+            Runs Command.getGLMData() once self.checkpoint is checked against the 
+            storm and settings of this run, so counts logged for another storm 
+            never stop a file from being downloaded. 
+
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.useSettings(self.checkpointSettings())
+        
+        Command.getGLMData(self, workers)
         
     def merge(self):
         """
@@ -55,60 +229,650 @@ class Driver(interpolate, Command):
         Returns
         -------
         Pandas DataFrame
-            Returns a dataframe containing the merged self.interpolatedDataFrame and self.dataInfoDataFrame
+            Returns a dataframe containing the merged self.interpolatedDataFrame and self.dataInfoDataFrame. 
+            Each file is matched to the storm position at the midpoint of its scan 
+            with .locateFiles(), so files that do not start exactly on an 
+            interpolated timestamp are kept. Planned files that self.checkpoint 
+            holds counts for are kept too, as they are not downloaded again. 
+
+        """
+        self.instrument.start('merge')
+        files = self.filesDataFrame
+        
+        if self.checkpoint is not None:
+            self.checkpoint.useSettings(self.checkpointSettings())
+        if self.checkpoint is not None and self.downloadPlan is not None:
+            #planned files counted before a restart are kept even though they were not downloaded
+            onDisk = set(os.path.basename(fileName) for fileName in files['File Name'])
+            counted = [self.filepath + os.path.basename(key) for key, size in self.downloadPlan 
+                       if os.path.basename(key) not in onDisk and self.checkpoint.countedResults(key) is not None]
+            if counted:
+                files = pd.concat([files, self.parseFileNames(counted)]).sort_values(by='File Scan Begin Time')
+        
+        self.mergedDataFrame = self.locateFiles(files)
+        self.instrument.end('merge', files=len(self.mergedDataFrame))
+        
+    def getHeadings(self, df):
+        """
+        
+
+        Parameters
+        ----------
+        df : Pandas DataFrame
+            The merged dataframe. 
+
+        Returns
+        -------
+        Pandas Series
+            The Storm Heading of every row, or nan for every row if the 
+            interpolation did not record a heading. 
+
+        """
+        if 'Storm Heading' in df:
+            return df['Storm Heading']
+        
+        return pd.Series(np.nan, index=df.index)
+        
+    def trackSignature(self):
+        """
+        
+
+        Returns
+        -------
+        Str
+            A hash of the fix times, lats and lons of the storm and the method 
+            positions are found with, the same for two runs only when they 
+            put the storm at the same place at every scan. 
+
+        """
+        fixTimes, fixLats, fixLons = self.getFixes()
+        fixes = [[pd.Timestamp(time).isoformat(), round(float(lat), 6), round(float(lon), 6)] 
+                 for time, lat, lon in zip(fixTimes, fixLats, fixLons)]
+        
+        return hashlib.sha1(json.dumps([self.positionMethod, fixes]).encode()).hexdigest()
+        
+    def checkpointSettings(self):
+        """
+        
+
+        Returns
+        -------
+        Dictionary
+            The storm track and the settings the counts depend on, kept by 
+            self.checkpoint so counts made for another storm or with other 
+            settings are never restored. 
+
+        """
+        return {'track': self.trackSignature(), 'geometry': self.geometry, 'size': self.boxSize, 'radii': self.radii, 
+                'rings': self.rings, 'perFlash': self.perFlash}
+        
+    def resumeAfterWritten(self, df):
+        """
+        
+
+        Parameters
+        ----------
+        df : Pandas DataFrame
+            The merged rows of a run, with a File Scan Begin Time column. 
+
+        Returns
+        -------
+        Pandas DataFrame
+            The rows scanned after the last scan in self.writer, so a run that 
+            stopped part way carries on where it left off. All of df when there 
+            is no writer or nothing has been written. 
+            Raises a ValueError when self.writer holds the rows of another storm 
+            or other settings. 
 
         """
-        filesDataFrame = self.filesDataFrame
-        interpolatedDataFrame = self.interpolatedDataFrame
-        self.mergedDataFrame = pd.merge(filesDataFrame, interpolatedDataFrame, left_on='File Scan Begin Time', right_on='Interpolated TimeStamps', how='left')
-        self.mergedDataFrame.dropna(inplace=True)
+        if self.writer is None:
+            return df
         
-    def processNetCDFs(self):
+        self.writer.useSettings(self.checkpointSettings())
+        lastTime = self.writer.lastWrittenTime()
+        if lastTime is None:
+            return df
+        
+        remaining = df[df['File Scan Begin Time'] > lastTime]
+        print('Resuming after {}, {} of {} scans are already written.'.format(lastTime, len(df) - len(remaining), len(df)))
+        
+        return remaining
+        
+    def restoreCounts(self, fileName, scans):
+        """
+        
+
+        Parameters
+        ----------
+        fileName : Str
+            A GLM file name, path or S3 key. 
+        scans : List
+            The (time, lat, lon, heading) of every scan the file is counted for. 
+
+        Returns
+        -------
+        List
+            The results self.checkpoint holds for the file, kept to the scan 
+            times asked for, or None if there is no checkpoint, the file has 
+            not been counted or none of its results are for these scans. 
+
+        """
+        if self.checkpoint is None:
+            return None
+        
+        fileResults = self.checkpoint.countedResults(fileName)
+        if fileResults is None:
+            return None
+        
+        times = set(time for time, lat, lon, heading in scans)
+        fileResults = [result for result in fileResults if result[0] in times]
+        
+        return fileResults if fileResults else None
+        
+    def handOverCounts(self, fileResults, flashDic):
         """
         
 
+        Parameters
+        ----------
+        fileResults : List
+            The (time, lat, lon, flashCount, extraColumns) results of one file, 
+            handed over in scan order. 
+        flashDic : Dictionary
+            The dictionary the counts are kept in when there is no writer. 
+
+        Returns
+        -------
+        Dictionary
+            Adds every count to self.aggregator, and appends it to self.writer 
+            or keeps it in flashDic by scan time. 
+
+        """
+        for time, lat, lon, totalflashCount, extraColumns in fileResults:
+            if self.aggregator is not None:
+                self.aggregator.add(time, totalflashCount)
+            if self.writer is not None:
+                self.writer.write(time, lat, lon, totalflashCount, extraColumns)
+            else:
+                flashDic[time] = (lat, lon, totalflashCount, extraColumns) if extraColumns else (lat, lon, totalflashCount)
+        
+    def processNetCDFs(self, parallel=False, workers=None):
+        """
+        
+
+        Parameters
+        ----------
+        parallel : Bool
+            If True the rows of self.mergedDataFrame are fanned out to a pool 
+            of processes, each opening its own netCDF. Default is False. 
+            Either way a file matched to several rows is read once and its 
+            boxes are answered from a FlashIndex. 
+        workers : Int
+            The number of worker processes used when parallel is True. Default 
+            is None, which uses one worker per core. 
+
         Returns
         -------
         Dictionary
             returns a dictionary of all processed netcdfs with flashcount at lat and lon
-            by time. The box size for a valid flash count is 111km by 111km or 1 degree up, down, left and 
-            right from each lat lon location. 
+            by time. By default the box for a valid flash count is 1 degree up, down, left and 
+            right from each lat lon location. Use .setBoxGeometry() to count a km box or a 
+            great-circle radius instead, or several radii at once. 
+            
+            When self.writer is set the counts are appended to it as each file is 
+            counted instead, and a rerun carries on after the last scan written. 
+            When self.checkpoint is set every counted file is logged with its 
+            results, and files logged before a restart are restored, not opened. 
+            When self.aggregator is set every count is added to it in scan order. 
 
         """
         
         print('Processing {} netCDF files now!'.format(len(self.filesDataFrame)))
         print('\n')
         
-        df = self.mergedDataFrame
+        df = self.resumeAfterWritten(self.mergedDataFrame)
+        
+        #group the rows by file so a file asked for several boxes is only read once
+        tasks = {}
+        for fileName, time, lat, lon, heading in zip(df['File Name'], df['File Scan Begin Time'], df['Interpolated Lats'], df['Interpolated Lons'], self.getHeadings(df)):
+            tasks.setdefault(fileName, []).append((time, lat, lon, heading))
+        tasks = list(tasks.items())
+        
+        #files counted before a restart are restored instead of counted
+        restored = {}
+        if self.checkpoint is not None:
+            self.checkpoint.useSettings(self.checkpointSettings())
+            for fileName, scans in tasks:
+                fileResults = self.restoreCounts(fileName, scans)
+                if fileResults is not None:
+                    restored[fileName] = fileResults
+            print('Restored {} of {} files from the checkpoint.'.format(len(restored), len(tasks)))
+        toCount = [task for task in tasks if task[0] not in restored]
         
         flashDic = {}
         fileCount = 0
-        fileLength = str(len(self.filesDataFrame))
-        for i, row in df.iterrows():
-            totalflashCount = 0
-            fileName = row['File Name']
-            time = row['File Scan Begin Time']
-            fileCount += 1
-            print("Images Processed: ", str(fileCount) + '/' + fileLength)
-            ds = nc.Dataset(fileName)
-            lat = row['Interpolated Lats']
-            lon = row['Interpolated Lons']
-            hugeLatBounds = [lat-1, lat+1]
-            hugeLonBounds = [lon-1, lon+1]
-            flash_lats = ds.variables['flash_lat']
-            flash_lons = ds.variables['flash_lon']
-            
-            
-            #count the flashes in the bounds
-            for i in flash_lats[:]:
-                for j in flash_lons[:]:
-                    if i>=hugeLatBounds[0] and i<=hugeLatBounds[1] and j>=hugeLonBounds[0] and j<=hugeLonBounds[1]:
-                        totalflashCount += 1
-                        
-            flashDic[time] = (lat, lon, totalflashCount)
+        nBytes = 0
+        settings = self.countSettings()
+        reader.resetTimings()
+        start = timer()
+        
+        if parallel:
+            if workers is None:
+                workers = os.cpu_count()
+            self.instrument.start('processNetCDFs', parallel=True, workers=workers, restored=len(restored))
+            chunkSize = max(1, len(toCount) // (workers * 4))
+            #the settings go to each worker once, not with every file
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(settings,))
+            #map hands the results back in the order of tasks
+            results = executor.map(countFlashesInWorker, toCount, chunksize=chunkSize)
+        else:
+            self.instrument.start('processNetCDFs', parallel=False, restored=len(restored))
+            executor = None
+            results = map(partial(countFlashesForFile, **settings), toCount)
+        
+        try:
+            for fileName, scans in tasks:
+                fileResults = restored.get(fileName)
+                if fileResults is None:
+                    fileResults = next(results)
+                    if self.checkpoint is not None:
+                        self.checkpoint.recordCount(fileName, fileResults)
+                    if os.path.exists(fileName):
+                        nBytes += os.path.getsize(fileName)
+                fileCount += 1
+                self.instrument.progress('processNetCDFs', fileCount, len(tasks))
+                #the tasks are counted in scan order, so they are handed over as they come
+                self.handOverCounts(fileResults, flashDic)
+        finally:
+            if self.writer is not None:
+                self.writer.flush()
+            if executor is not None:
+                executor.shutdown()
+                #pick up the bounds the workers added to the index
+                if self.boundsIndex is not None:
+                    self.boundsIndex.load()
+        
+        seconds = timer() - start
+        #the flashes read by the workers of a process pool are not seen here
+        self.instrument.end('processNetCDFs', files=fileCount, nBytes=nBytes, flashes=None if parallel else reader.nFlashes)
+        print('\n')
+        print('Counted {} files in {:.2f} s ({:.1f} files/s, {} mode)'.format(
+            fileCount, seconds, fileCount / max(seconds, 1e-9), 'per-flash' if self.perFlash else 'per-file'))
+        #the workers of a process pool keep their own timings
+        if not parallel:
+            reader.printTimings()
             
         self.dataDictionary = flashDic
         
+    def fetchFile(self, key, size, lat, lon, inMemory=False):
+        """
+        
+
+        Parameters
+        ----------
+        key : Str
+            The key of a planned GLM file. 
+        size : Int
+            The size of the file in bytes. 
+        lat : Float
+            Latitude of the storm at the scan. 
+        lon : Float
+            Longitude of the storm at the scan. 
+        inMemory : Bool
+            If True the bytes of the file are returned instead of written to 
+            the data directory. Default is False. 
+
+        Returns
+        -------
+        Tuple
+            The (fileName, memory, onDisk) of the file, ready to be counted. 
+            Nothing is fetched for a file self.checkpoint holds counts for, a 
+            file self.boundsIndex knows is far from the storm, or a file whose 
+            entry in self.cache loads and holds what the count needs, and the 
+            key is returned with no memory. 
+
+        """
+        bounds = self.boundsIndex.get(key) if self.boundsIndex is not None else None
+        if self.checkpoint is not None and self.checkpoint.countedResults(key) is not None:
+            #counted before a restart, nothing to fetch
+            return (key, None, False)
+        if bounds is not None and not boundsMayReach(bounds, lat, lon, self.geometry, self.boxSize, 
+                                                     self.radii, self.rings, 0.5 if self.perFlash else 0):
+            #the flashes of the file are known to be far from the storm, nothing to fetch
+            return (key, None, False)
+        if self.cache is not None:
+            #the entry is loaded to decide, a missing, broken or evicted entry or one 
+            #without the flash times a per-flash count needs is fetched instead. The 
+            #load marks it recently used, so it is not evicted before it is counted
+            flashes = self.cache.get(key)
+            if flashes is not None and (not self.perFlash or 'time_coverage_start' in flashes):
+                return (key, None, False)
+        if inMemory:
+            return (key, self.bucket.getObject(key), False)
+        
+        self.bucket.downloadObject(key, size, self.filepath)
+        
+        return (os.path.join(self.filepath, os.path.basename(key)), None, True)
+        
+    def streamNetCDFs(self, workers=4, queueSize=8, inMemory=False):
+        """
+        
+
+        Parameters
+        ----------
+        workers : Int
+            The number of files downloaded at the same time. Default is 4. 
+        queueSize : Int
+            The maximum number of downloaded files waiting to be counted. When 
+            the queue is full the downloads pause, so at most workers + queueSize 
+            files are on disk at once. Default is 8. 
+        inMemory : Bool
+            If True the fetched bytes are opened straight from memory and nothing 
+            is written to the data directory. Default is False. 
+
+        Returns
+        -------
+        Dictionary
+            Fetches, counts and deletes each file in self.downloadPlan as a 
+            producer/consumer pipeline instead of downloading everything first. 
+            Fills self.filesDataFrame, self.mergedDataFrame and self.dataDictionary 
+            the same way as .createFilesInfoDataFrame(), .merge() and 
+            .processNetCDFs() do. The fetch and count time of every file is kept 
+            in self.fileLatencies and the averages are printed at the end. Files 
+            self.checkpoint holds counts for are restored without being fetched. 
+            The counts reach self.writer and self.aggregator in scan order. 
+
+        """
+        if self.downloadPlan is None:
+            self.planDownloads()
+        
+        #the merged rows are built from the planned keys, no files are needed yet
+        sizes = dict(self.downloadPlan)
+        self.filesDataFrame = self.parseFileNames(list(sizes))
+        self.merge()
+        df = self.resumeAfterWritten(self.mergedDataFrame)
+        scans = list(zip(df['File Name'], df['File Scan Begin Time'], df['Interpolated Lats'], df['Interpolated Lons'], self.getHeadings(df)))
+        
+        print('Streaming {} netCDF files now!'.format(len(scans)))
+        print('\n')
+        
+        if not inMemory:
+            os.makedirs(self.filepath, exist_ok=True)
+        locate = self.getLocator()
+        if self.checkpoint is not None:
+            self.checkpoint.useSettings(self.checkpointSettings())
+        reader.resetTimings()
+        self.instrument.start('streamNetCDFs', workers=workers, queueSize=queueSize, inMemory=inMemory)
+        fileQueue = queue.Queue(maxsize=queueSize)
+        done = object() #marks the end of the downloads on the queue
+        cancel = threading.Event() #set when the counting stops, so the downloads stop too
+        fetchSeconds = {}
+        fetchBytes = {}
+        
+        def put(item):
+            #blocks while the queue is full, which holds back the downloads, until the counting stops
+            while not cancel.is_set():
+                try:
+                    fileQueue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            if isinstance(item, tuple) and item[3]:
+                #fetched but never counted
+                os.remove(item[1])
+        
+        def fetch(index):
+            if cancel.is_set():
+                return
+            key, time, lat, lon, heading = scans[index]
+            start = timer()
+            fileName, memory, onDisk = self.fetchFile(key, sizes[key], lat, lon, inMemory)
+            if memory is not None or onDisk:
+                fetchBytes[index] = sizes[key]
+            fetchSeconds[index] = timer() - start
+            put((index, fileName, memory, onDisk))
+        
+        def produce():
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for _ in executor.map(fetch, range(len(scans))):
+                        pass
+            except Exception as e:
+                put(e)
+            put(done)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        flashDic = {}
+        #files finish downloading out of order, the scans are handed over in scan order
+        order = ScanOrder(partial(self.handOverCounts, flashDic=flashDic))
+        order.expect(range(len(scans)))
+        countSeconds = {}
+        nCounted = 0
+        try:
+            while True:
+                item = fileQueue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                index, fileName, memory, onDisk = item
+                key, time, lat, lon, heading = scans[index]
+                start = timer()
+                try:
+                    fileResults = self.restoreCounts(key, [(time, lat, lon, heading)])
+                    if fileResults is None:
+                        fileResults = [countFlashesForScan((fileName, time, lat, lon, heading), memory, self.cache, self.geometry, self.boxSize, self.radii, self.rings, locate, self.boundsIndex)]
+                        if self.checkpoint is not None:
+                            self.checkpoint.recordCount(key, fileResults)
+                finally:
+                    if onDisk:
+                        os.remove(fileName)
+                countSeconds[index] = timer() - start
+                nCounted += 1
+                self.instrument.progress('streamNetCDFs', nCounted, len(scans), queueDepth=fileQueue.qsize())
+                order.add(index, fileResults)
+        finally:
+            #after an error the downloads are stopped and the files fetched but not counted are removed
+            cancel.set()
+            producer.join()
+            while not fileQueue.empty():
+                item = fileQueue.get()
+                if isinstance(item, tuple) and item[3]:
+                    os.remove(item[1])
+            if self.writer is not None:
+                self.writer.flush()
+        
+        self.instrument.end('streamNetCDFs', files=nCounted, nBytes=sum(fetchBytes.values()), flashes=reader.nFlashes)
+        
+        self.dataDictionary = flashDic
+        self.fileLatencies = pd.DataFrame({'Fetch Seconds': [fetchSeconds[i] for i in range(len(scans))], 
+                                           'Count Seconds': [countSeconds[i] for i in range(len(scans))]})
+        
+        print('\n')
+        print('Mean per-file latency ({}): fetch {:.1f} ms, open and count {:.1f} ms'.format(
+            'in memory' if inMemory else 'on disk', 
+            1000 * self.fileLatencies['Fetch Seconds'].mean(), 
+            1000 * self.fileLatencies['Count Seconds'].mean()))
+        reader.printTimings()
+        
+    async def runAsync(self, listWorkers=4, downloadWorkers=16, countWorkers=None, queueSize=16, inMemory=False):
+        """
+        
+
+        Parameters
+        ----------
+        listWorkers : Int
+            The number of hourly buckets listed at the same time. Default is 4. 
+        downloadWorkers : Int
+            The number of files downloaded at the same time. Default is 16. 
+        countWorkers : Int
+            The number of processes counting files at the same time. Default 
+            is None, which uses one per core. 
+        queueSize : Int
+            The maximum number of files waiting to be downloaded, and of 
+            downloaded files waiting to be counted. A full queue pauses the stage 
+            feeding it, so a slow stage holds back the faster ones instead of 
+            piling files up on disk or in memory. Default is 16. 
+        inMemory : Bool
+            If True the fetched bytes are counted straight from memory and 
+            nothing is written to the data directory. Default is False. 
+
+        Returns
+        -------
+        Dictionary
+            Lists, downloads and counts the files of self.lookupList as three 
+            overlapping stages on an event loop, ex:
+                asyncio.run(obj.runAsync())
+            The files of an hour are downloaded as soon as that hour is listed, 
+            and counted on a pool of processes as soon as they arrive, so the 
+            network and the cores are busy at the same time. Fills 
+            self.downloadPlan, self.filesDataFrame, self.mergedDataFrame and 
+            self.dataDictionary the same way as .planDownloads(), .merge() and 
+            .processNetCDFs() do, and uses self.writer, self.checkpoint, 
+            self.aggregator, self.boundsIndex and self.cache the same way as 
+            .streamNetCDFs(). 
+
+        """
+        loop = asyncio.get_running_loop()
+        if countWorkers is None:
+            countWorkers = os.cpu_count()
+        if self.bucket is None:
+            #made here so the listing threads share one bucket
+            self.bucket = S3Bucket(self.lookupList[0][len('s3://'):].split('/', 1)[0])
+        if not inMemory:
+            os.makedirs(self.filepath, exist_ok=True)
+        if self.checkpoint is not None:
+            self.checkpoint.useSettings(self.checkpointSettings())
+        if self.writer is not None:
+            self.writer.useSettings(self.checkpointSettings())
+        lastTime = self.writer.lastWrittenTime() if self.writer is not None else None
+        
+        threads = ThreadPoolExecutor(max_workers=listWorkers + downloadWorkers)
+        #the settings go to each worker once, not with every file
+        processes = ProcessPoolExecutor(max_workers=countWorkers, initializer=initWorker, initargs=(self.countSettings(),))
+        listLimit = asyncio.Semaphore(listWorkers)
+        downloadQueue = asyncio.Queue(maxsize=queueSize) #planned files waiting to be downloaded
+        countQueue = asyncio.Queue(maxsize=queueSize) #downloaded files waiting to be counted
+        
+        hours = [None] * len(self.lookupList) #the located rows of every listed hour, in scan order
+        sizes = {}
+        flashDic = {}
+        #files finish out of order, the scans are handed over in scan order hour by hour
+        order = ScanOrder(partial(self.handOverCounts, flashDic=flashDic), parts=len(self.lookupList))
+        state = {'planned': 0, 'listed': 0, 'counted': 0, 'bytes': 0}
+        onDiskFiles = set() #files fetched to the data directory and not yet removed
+        
+        print('Listing, downloading and counting {} buckets now!'.format(len(self.lookupList)))
+        print('\n')
+        self.instrument.start('runAsync', listWorkers=listWorkers, downloadWorkers=downloadWorkers, countWorkers=countWorkers, inMemory=inMemory)
+        
+        async def listHour(i):
+            async with listLimit:
+                objects = await loop.run_in_executor(threads, self.listPrefix, self.lookupList[i])
+            sizes.update(objects)
+            hours[i] = self.locateFiles(self.parseFileNames([key for key, size in objects]))
+            #a rerun carries on after the last scan written
+            remaining = hours[i] if lastTime is None else hours[i][hours[i]['File Scan Begin Time'] > lastTime]
+            order.expect(remaining['File Name'], i)
+            state['planned'] += len(remaining)
+            state['listed'] += 1
+            for key, time, lat, lon, heading in zip(remaining['File Name'], remaining['File Scan Begin Time'], remaining['Interpolated Lats'], 
+                                                    remaining['Interpolated Lons'], self.getHeadings(remaining)):
+                #waits while the downloads are behind
+                await downloadQueue.put((key, [(time, lat, lon, heading)]))
+        
+        def fetch(key, lat, lon):
+            #noted in the thread, so a file is removed even when the download it finishes was cancelled
+            fileName, memory, onDisk = self.fetchFile(key, sizes[key], lat, lon, inMemory)
+            if onDisk:
+                onDiskFiles.add(fileName)
+            return fileName, memory, onDisk
+        
+        def remove(fileName):
+            onDiskFiles.discard(fileName)
+            if os.path.exists(fileName):
+                os.remove(fileName)
+        
+        async def download():
+            while True:
+                item = await downloadQueue.get()
+                if item is None:
+                    return
+                key, scans = item
+                fileName, memory, onDisk = await loop.run_in_executor(threads, fetch, key, scans[0][1], scans[0][2])
+                if memory is not None or onDisk:
+                    state['bytes'] += sizes[key]
+                #waits while the counting is behind
+                await countQueue.put((key, scans, fileName, memory, onDisk))
+        
+        async def count():
+            while True:
+                item = await countQueue.get()
+                if item is None:
+                    return
+                key, scans, fileName, memory, onDisk = item
+                try:
+                    fileResults = self.restoreCounts(key, scans)
+                    if fileResults is None:
+                        fileResults = await loop.run_in_executor(processes, countFlashesInWorker, (fileName, scans), memory)
+                        if self.checkpoint is not None:
+                            self.checkpoint.recordCount(key, fileResults)
+                finally:
+                    if onDisk:
+                        remove(fileName)
+                state['counted'] += 1
+                #the total is not known until every hour is listed
+                self.instrument.progress('runAsync', state['counted'], state['planned'] if state['listed'] == len(hours) else None, 
+                                         downloadQueue=downloadQueue.qsize(), countQueue=countQueue.qsize())
+                order.add(key, fileResults)
+        
+        async def listAll():
+            await asyncio.gather(*[listHour(i) for i in range(len(hours))])
+            for _ in range(downloadWorkers):
+                await downloadQueue.put(None)
+        
+        async def downloadAll():
+            await asyncio.gather(*[download() for _ in range(downloadWorkers)])
+            for _ in range(countWorkers):
+                await countQueue.put(None)
+        
+        tasks = [asyncio.ensure_future(stage) for stage in [listAll(), downloadAll()] + [count() for _ in range(countWorkers)]]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            #after an error the other stages are stopped and the files fetched but not counted are removed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            threads.shutdown()
+            processes.shutdown()
+            while not countQueue.empty():
+                item = countQueue.get_nowait()
+                if item is not None and item[4]:
+                    remove(item[2])
+            for fileName in list(onDiskFiles):
+                remove(fileName)
+            if self.writer is not None:
+                self.writer.flush()
+            #pick up the bounds the workers added to the index
+            if self.boundsIndex is not None:
+                self.boundsIndex.load()
+        
+        #the workers of the process pool keep their own flash counts
+        event = self.instrument.end('runAsync', files=state['counted'], nBytes=state['bytes'])
+        
+        self.mergedDataFrame = pd.concat(hours).reset_index(drop=True)
+        self.downloadPlan = [(key, sizes[key]) for key in self.mergedDataFrame['File Name']]
+        self.filesDataFrame = self.parseFileNames(list(self.mergedDataFrame['File Name']))
+        self.dataDictionary = flashDic
+        
+        print('\n')
+        print('Counted {} files in {:.2f} s ({:.1f} files/s, {:.1f} MB fetched)'.format(
+            state['counted'], event['seconds'], event['filesPerSecond'], state['bytes'] / 1e6))
+        
     def makeFlashDataFrame(self):
         """
         
@@ -116,14 +880,27 @@ class Driver(interpolate, Command):
         Returns
         -------
         A dataframe of concatinated self.dataDictionary items to be used for plotting
-        the flash events by time. 
+        the flash events by time. Counts for extra radii are added as columns 
+        after the longitude. When self.writer is set the scans of the run are 
+        read back from its files instead. 
 
         """
+        self.instrument.start('makeFlashDataFrame')
+        
+        if self.writer is not None:
+            self.writer.useSettings(self.checkpointSettings())
+            times = self.mergedDataFrame['File Scan Begin Time']
+            written = self.writer.read(times.min(), times.max())
+            for column in written.columns:
+                self.processedDataFrame[column] = written[column].values
+            self.instrument.end('makeFlashDataFrame', scans=len(written))
+            return
         
         flashList = []
         timeList = []
         latList = []
         lonList = []
+        extraColumns = {}
         
         for i in self.dataDictionary:
             time = i
@@ -134,11 +911,18 @@ class Driver(interpolate, Command):
             lonList.append(lon)
             flashes = self.dataDictionary.get(i)[2]
             flashList.append(flashes)
+            if len(self.dataDictionary.get(i)) > 3:
+                for column, value in self.dataDictionary.get(i)[3].items():
+                    extraColumns.setdefault(column, []).append(value)
         
         self.processedDataFrame['Time of Scan'] = timeList
         self.processedDataFrame['Flash Count'] = flashList
         self.processedDataFrame['Latitude'] = latList
         self.processedDataFrame['Longitude'] = lonList
+        for column in extraColumns:
+            self.processedDataFrame[column] = extraColumns[column]
+        
+        self.instrument.end('makeFlashDataFrame', scans=len(timeList))
         
         
     def plotFlashesByTime(self):
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class GLM File
+
+Purpose: This class is the one place GLM L2 LCFA netCDFs are opened. Each file
+is opened once, only the requested variables are read, netCDF4 applies the
+masking and scale factors to the whole variable at once, and the result comes
+back as contiguous float32 arrays with nan where values are missing. The file
+handle is closed as soon as the arrays are read, so hundreds of files never
+hold hundreds of open handles. A file whose number_of_flashes dimension is
+empty returns empty arrays without decoding any variable.
+
+The reader also keeps the time spent opening files, reading variables and
+counting flashes, so the slow step of a run can be seen at a glance.
+
+Methods:
+    __init__()
+    read()
+    timing()
+    resetTimings()
+    printTimings()
+
+For a list of method descriptions:
+    help(GLMReader)
+
+@author: coreywalker
+"""
+
+import numpy as np
+import netCDF4 as nc
+from contextlib import contextmanager
+from timeit import default_timer as timer
+
+
+class GLMReader():
+
+    def __init__(self):
+        """
+        constructor containing the timing attributes of the reader.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.timings = {} #seconds spent in each stage, ex: open, read and count
+        self.nFiles = 0 #the number of files read since the last reset
+        self.nSkipped = 0 #the number of files skipped from their flash bounds since the last reset
+        self.nFlashes = 0 #the number of flashes in the files read since the last reset
+        self.resetTimings()
+
+    def read(self, fileName, variables, memory=None, coverageStart=False):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            Path to a GLM L2 LCFA netCDF file.
+        variables : List
+            The names of the variables to read, ex:
+                ['flash_lat', 'flash_lon']
+        memory : Bytes
+            The content of the file. If given the file is opened from memory and
+            fileName is only used as a label. Default is None.
+        coverageStart : Bool
+            If True the time_coverage_start attribute is returned as well, in
+            nanoseconds since 1970 under the 'time_coverage_start' key.
+            Default is False.
+
+        Returns
+        -------
+        Dictionary
+            A contiguous float32 array for every variable keyed by name, with
+            masked values returned as nan.
+
+        """
+        start = timer()
+        with nc.Dataset(fileName, memory=memory) as ds:
+            opened = timer()
+
+            arrays = {}
+            #a file without flashes has nothing worth decoding
+            dimension = ds.dimensions.get('number_of_flashes')
+            empty = dimension is not None and len(dimension) == 0
+            if dimension is not None:
+                self.nFlashes += len(dimension)
+            for name in variables:
+                if empty:
+                    arrays[name] = np.empty(0, dtype=np.float32)
+                    continue
+                #scale and mask the whole variable in one call
+                values = ds.variables[name][:]
+                arrays[name] = np.ascontiguousarray(np.ma.filled(values.astype(np.float32), np.nan))
+            if coverageStart:
+                arrays['time_coverage_start'] = np.array(np.datetime64(ds.time_coverage_start.rstrip('Z'), 'ns').astype('int64'))
+
+        self.timings['open'] += opened - start
+        self.timings['read'] += timer() - opened
+        self.nFiles += 1
+
+        return arrays
+
+    @contextmanager
+    def timing(self, stage):
+        """
+
+
+        Parameters
+        ----------
+        stage : Str
+            The name of the stage being timed, ex:
+                count
+
+        Returns
+        -------
+        Context Manager
+            Adds the seconds spent inside the with block to self.timings[stage].
+
+        """
+        start = timer()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0) + timer() - start
+
+    def resetTimings(self):
+        """
+
+
+        Returns
+        -------
+        Self.
+            Sets every timing and the file and flash counts back to zero.
+
+        """
+        self.timings = {'open': 0.0, 'read': 0.0, 'count': 0.0}
+        self.nFiles = 0
+        self.nSkipped = 0
+        self.nFlashes = 0
+
+    def printTimings(self):
+        """
+
+
+        Returns
+        -------
+        Str.
+            Prints the total and per-file milliseconds spent opening, reading and
+            counting since the last reset, and the number of files skipped
+            without being read.
+
+        """
+        if self.nSkipped:
+            print('skipped {} files whose flashes cannot reach the storm'.format(self.nSkipped))
+        for stage, seconds in self.timings.items():
+            print('{}: {:.2f} s total, {:.2f} ms per file'.format(stage, seconds, 1000 * seconds / max(self.nFiles, 1)))
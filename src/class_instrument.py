@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Instrument File
+
+Purpose: This class reports what every stage of a run is doing, so the slow
+stage of a production run can be found without reading a wall of prints.
+
+Each stage of the Data, Command and Driver classes (listing, downloading,
+cataloging, merging, counting and cleaning up) emits a start event and an end
+event with its seconds, and the files, bytes and flashes it handled with
+their rates. While files are counted a progress event is emitted as well,
+with the queue depth in the streaming mode. Events are dictionaries, ex:
+
+    {'stage': 'processNetCDFs', 'event': 'end', 'time': 1621468860.2,
+     'seconds': 0.22, 'files': 540, 'filesPerSecond': 2454.5, ...}
+
+and are appended as JSON lines to eventFile, handed to a callback, or both.
+
+Every Driver holds an Instrument with neither, which only draws a progress bar
+redrawn at most every interval seconds in place of a line per file. Set one
+with an event file or a callback to record the run:
+
+    obj.instrument = Instrument('events.jsonl')
+    obj.instrument = Instrument(callback=events.append)
+
+Methods:
+    __init__()
+    emit()
+    start()
+    end()
+    progress()
+    printSummary()
+
+For a list of method descriptions:
+    help(Instrument)
+
+@author: coreywalker
+"""
+
+import sys
+import json
+import time
+import threading
+from timeit import default_timer as timer
+
+
+class Instrument():
+
+    def __init__(self, eventFile=None, callback=None, progressBar=True, interval=0.5):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        eventFile : Str
+            A JSON lines file every event is appended to. Default is None.
+        callback : Function
+            A function called with every event dictionary. Default is None.
+        progressBar : Bool
+            If True a progress bar is drawn while files are counted. Default
+            is True.
+        interval : Float
+            The least number of seconds between two progress bar draws or
+            progress events. Default is 0.5.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.eventFile = eventFile #the JSON lines file events are appended to. Default is None.
+        self.callback = callback #a function handed every event. Default is None.
+        self.progressBar = progressBar #if True the progress of a stage is drawn as a bar
+        self.interval = interval #seconds between two progress updates
+        self.started = {} #the timer value each open stage started at keyed by stage
+        self.stages = {} #the end event of every finished stage keyed by stage
+        self.lastProgress = 0.0 #the timer value of the last progress update
+        self.lock = threading.Lock() #keeps events emitted from several threads whole
+
+    def emit(self, event):
+        """
+
+
+        Parameters
+        ----------
+        event : Dictionary
+            The event, with at least a 'stage' and an 'event' key.
+
+        Returns
+        -------
+        Dictionary
+            Stamps the event with the wall clock 'time', appends it to
+            self.eventFile and hands it to self.callback.
+
+        """
+        event['time'] = time.time()
+        with self.lock:
+            if self.eventFile is not None:
+                with open(self.eventFile, 'a') as f:
+                    f.write(json.dumps(event) + '\n')
+            if self.callback is not None:
+                self.callback(event)
+
+        return event
+
+    def start(self, stage, **fields):
+        """
+
+
+        Parameters
+        ----------
+        stage : Str
+            The name of the stage, ex:
+                getGLMData
+        **fields :
+            Anything else worth recording about the stage, ex:
+                workers=16
+
+        Returns
+        -------
+        Dictionary
+            Starts the clock of the stage and emits its start event.
+
+        """
+        self.started[stage] = timer()
+        self.lastProgress = 0.0
+
+        return self.emit(dict(stage=stage, event='start', **fields))
+
+    def end(self, stage, files=None, nBytes=None, flashes=None, **fields):
+        """
+
+
+        Parameters
+        ----------
+        stage : Str
+            The name of a started stage.
+        files : Int
+            The number of files the stage handled. Default is None.
+        nBytes : Int
+            The number of bytes the stage read, downloaded or freed. Default
+            is None.
+        flashes : Int
+            The number of flashes the stage scanned. Default is None.
+        **fields :
+            Anything else worth recording about the stage.
+
+        Returns
+        -------
+        Dictionary
+            Emits the end event of the stage with its seconds and the rate of
+            every count given, and keeps it in self.stages.
+
+        """
+        seconds = timer() - self.started.pop(stage, timer())
+        event = dict(stage=stage, event='end', seconds=seconds, **fields)
+        for name, value in [('files', files), ('bytes', nBytes), ('flashes', flashes)]:
+            if value is not None:
+                event[name] = int(value)
+                event[name + 'PerSecond'] = value / max(seconds, 1e-9)
+
+        self.stages[stage] = self.emit(event)
+
+        return event
+
+    def progress(self, stage, done, total, **fields):
+        """
+
+
+        Parameters
+        ----------
+        stage : Str
+            The name of a started stage.
+        done : Int
+            The number of files done so far.
+        total : Int
+            The number of files the stage will do, or None while it is not
+            known yet.
+        **fields :
+            Anything else worth recording, ex:
+                queueDepth=3
+
+        Returns
+        -------
+        Str
+            Redraws the progress bar and emits a progress event, at most once
+            every self.interval seconds and always for the last file.
+
+        """
+        now = timer()
+        last = total is not None and done >= total
+        if not last and now - self.lastProgress < self.interval:
+            return
+        self.lastProgress = now
+
+        rate = done / max(now - self.started.get(stage, now), 1e-9)
+        self.emit(dict(stage=stage, event='progress', done=done, total=total, filesPerSecond=rate, **fields))
+
+        if self.progressBar:
+            extra = ''.join(' {} {}'.format(name, value) for name, value in fields.items())
+            #the stream is looked up on every draw so a redirected stdout is followed
+            if total is None:
+                sys.stdout.write('\r{} {} files {:.1f} files/s{}'.format(stage, done, rate, extra))
+            else:
+                filled = int(30 * done / max(total, 1))
+                sys.stdout.write('\r{} [{}{}] {}/{} files {:.1f} files/s{}'.format(stage, '#' * filled, '.' * (30 - filled), done, total, rate, extra))
+            if last:
+                sys.stdout.write('\n')
+            sys.stdout.flush()
+
+    def printSummary(self):
+        """
+
+
+        Returns
+        -------
+        Str
+            Prints the seconds, files/s and flashes/s of every finished stage,
+            slowest first.
+
+        """
+        for event in sorted(self.stages.values(), key=lambda event: -event['seconds']):
+            print('{:<26} {:>9.3f} s {:>10} files/s {:>12} flashes/s'.format(
+                event['stage'], event['seconds'],
+                '{:.1f}'.format(event['filesPerSecond']) if 'files' in event else '-',
+                '{:.0f}'.format(event['flashesPerSecond']) if 'flashes' in event else '-'))
@@ -7,6 +7,16 @@ Purpose: This class is used to interpolate the points between two latitude and l
 locations and create the start and stop download strings for AWS CLI based on the input
 data. 
 
+Besides the 20 second point grid, the storm position can be evaluated at any 
+times at once with .position(), which interpolates between the storm fixes 
+linearly in lat and lon, along the great circle, or with a natural cubic spline 
+through every fix of a track. 
+
+Functions:
+    toNanoseconds()
+    naturalCubicSpline()
+    interpolatePositions()
+
 Methods:
     
     __init__()
@@ -20,6 +30,11 @@ Methods:
     getNpointsForInterpolation()
     interpolateLatLons()
     createInterpolatedTimeStamps()
+    setTrackFixes()
+    setPositionMethod()
+    getFixes()
+    position()
+    locateFiles()
     createDownloadStartStopString()
     createDownloadList()
     plotInterpolation()
@@ -35,10 +50,148 @@ Created on Thu Jul 28 12:06:13 2022
 from geopy.distance import geodesic
 import numpy as np
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import datetime
 from class_data import Data
+from flash_count import bearingDegrees
 import pandas as pd
 
+#the methods understood by interpolatePositions()
+positionMethods = ['linear', 'geodesic', 'spline']
+
+
+def toNanoseconds(times):
+    """
+    
+
+    Parameters
+    ----------
+    times : array of datetimes
+        Datetimes, or integers that are already nanoseconds since 1970. 
+
+    Returns
+    -------
+    numpy array
+        The times as int64 nanoseconds since 1970, whatever resolution pandas 
+        stored them with. 
+
+    """
+    return np.asarray(pd.DatetimeIndex(times), dtype='datetime64[ns]').astype('int64')
+
+
+def naturalCubicSpline(x, y, xNew):
+    """
+    
+
+    Parameters
+    ----------
+    x : numpy array
+        Increasing knot positions. 
+    y : numpy array
+        Values at the knots. 
+    xNew : numpy array
+        Positions to evaluate the spline at. 
+
+    Returns
+    -------
+    numpy array
+        The natural cubic spline through (x, y) evaluated at xNew. 
+
+    """
+    n = len(x)
+    h = np.diff(x)
+    
+    #second derivatives at the knots, zero at both ends for a natural spline
+    A = np.zeros((n, n))
+    rhs = np.zeros(n)
+    A[0, 0] = 1
+    A[-1, -1] = 1
+    i = np.arange(1, n - 1)
+    A[i, i - 1] = h[i - 1]
+    A[i, i] = 2 * (h[i - 1] + h[i])
+    A[i, i + 1] = h[i]
+    rhs[i] = 6 * ((y[i + 1] - y[i]) / h[i] - (y[i] - y[i - 1]) / h[i - 1])
+    M = np.linalg.solve(A, rhs)
+    
+    k = np.clip(np.searchsorted(x, xNew, side='right') - 1, 0, n - 2)
+    left = x[k + 1] - xNew
+    right = xNew - x[k]
+    hk = h[k]
+    
+    return (M[k] * left ** 3 / (6 * hk) + M[k + 1] * right ** 3 / (6 * hk) + 
+            (y[k] / hk - M[k] * hk / 6) * left + (y[k + 1] / hk - M[k + 1] * hk / 6) * right)
+
+
+def interpolatePositions(times, fixTimes, fixLats, fixLons, method='linear'):
+    """
+    
+
+    Parameters
+    ----------
+    times : array of datetimes
+        The times to locate the storm at. 
+    fixTimes : array of datetimes
+        Increasing times of the storm fixes, at least two. 
+    fixLats : numpy array
+        Latitude of the storm at each fix. 
+    fixLons : numpy array
+        Longitude of the storm at each fix. 
+    method : Str
+        'linear' interpolates lat and lon linearly in time, 'geodesic' moves 
+        along the great circle between fixes at a constant speed, and 'spline' 
+        fits a natural cubic spline through every fix (linear with fewer than 
+        three fixes). Default is 'linear'. 
+
+    Returns
+    -------
+    Tuple of numpy arrays
+        The (lats, lons) of the storm at each time, nan outside of the fixes. 
+
+    """
+    if method not in positionMethods:
+        raise ValueError('Unknown method {}, use one of {}'.format(method, positionMethods))
+    
+    #hours since the first fix, which keeps the float math well conditioned
+    fixNs = toNanoseconds(fixTimes)
+    t = (toNanoseconds(times) - fixNs[0]) / 3.6e12
+    ft = (fixNs - fixNs[0]) / 3.6e12
+    fixLats = np.asarray(fixLats, dtype=float)
+    #unwrap so a track crossing the dateline does not jump 360 degrees
+    fixLons = np.degrees(np.unwrap(np.radians(np.asarray(fixLons, dtype=float))))
+    
+    if method == 'geodesic':
+        k = np.clip(np.searchsorted(ft, t, side='right') - 1, 0, len(ft) - 2)
+        f = (t - ft[k]) / (ft[k + 1] - ft[k])
+        
+        #spherical linear interpolation between the unit vectors of the two fixes
+        lat1, lon1 = np.radians(fixLats[k]), np.radians(fixLons[k])
+        lat2, lon2 = np.radians(fixLats[k + 1]), np.radians(fixLons[k + 1])
+        p1 = np.array([np.cos(lat1) * np.cos(lon1), np.cos(lat1) * np.sin(lon1), np.sin(lat1)])
+        p2 = np.array([np.cos(lat2) * np.cos(lon2), np.cos(lat2) * np.sin(lon2), np.sin(lat2)])
+        omega = np.arccos(np.clip((p1 * p2).sum(axis=0), -1, 1))
+        sinOmega = np.sin(omega)
+        moving = sinOmega > 1e-12
+        safeSin = np.where(moving, sinOmega, 1)
+        a = np.where(moving, np.sin((1 - f) * omega) / safeSin, 1 - f)
+        b = np.where(moving, np.sin(f * omega) / safeSin, f)
+        p = a * p1 + b * p2
+        
+        lats = np.degrees(np.arctan2(p[2], np.hypot(p[0], p[1])))
+        lons = np.degrees(np.arctan2(p[1], p[0]))
+    elif method == 'spline' and len(ft) >= 3:
+        lats = naturalCubicSpline(ft, fixLats, t)
+        lons = naturalCubicSpline(ft, fixLons, t)
+    else:
+        lats = np.interp(t, ft, fixLats)
+        lons = np.interp(t, ft, fixLons)
+    
+    lons = (lons + 180) % 360 - 180
+    outside = (t < ft[0]) | (t > ft[-1])
+    lats = np.where(outside, np.nan, lats)
+    lons = np.where(outside, np.nan, lons)
+    
+    return lats, lons
+
+
 class interpolate(Data):
     
     def __init__(self):
@@ -63,6 +216,11 @@ class interpolate(Data):
         self.newLats = 0 #new, interpolated latitudes between point 1 and point 2
         self.newLons = 0 #new, interpolated longitudes between point 2 adn point 2
         self.interpolatedDataFrame = pd.DataFrame() #dataframe containing interpolation metadata. Default is empty. 
+        self.hoursToPoint2 = 0 #the number of hours the storm takes from point 1 to point 2
+        self.fixTimes = None #times of the storm fixes used by .position(). Default is None, which uses the interpolated timestamps. 
+        self.fixLats = None #latitudes of the storm fixes
+        self.fixLons = None #longitudes of the storm fixes
+        self.positionMethod = 'linear' #how .position() interpolates between fixes, one of 'linear', 'geodesic' or 'spline'
        
         
     
@@ -162,6 +320,7 @@ class interpolate(Data):
 
         """
         
+        self.hoursToPoint2 = hoursToPoint2
         self.speed = self.distanceBetweenPoints / hoursToPoint2
         
         
@@ -199,13 +358,15 @@ class interpolate(Data):
         Returns
         -------
         A list of interpolated lats and lons based on the calcuated nPoints 
-        and stores these in the interpolation dataFrame. 
+        and stores these in the interpolation dataFrame, along with the heading 
+        of the storm from point 1 to point 2 in degrees clockwise from north. 
 
         """
         self.newLats = np.linspace(self.lat1, self.lat2, int(self.nPoints))
         self.newLons = np.linspace(self.lon1, self.lon2, int(self.nPoints))
         self.interpolatedDataFrame['Interpolated Lats'] = self.newLats
         self.interpolatedDataFrame['Interpolated Lons'] = self.newLons
+        self.interpolatedDataFrame['Storm Heading'] = bearingDegrees(self.lat1, self.lon1, self.lat2, self.lon2)
     
     def createInterpolatedTimeStamps(self, startYear, startMonth, startDay, startHour, startMin, startSec):
         """
@@ -254,17 +415,141 @@ class interpolate(Data):
         beginMilisec = 00
         startDate = datetime(startYear, startMonth, startDay, startHour, startMin, startSec, beginMilisec)
         
-        timeDelta = timedelta(seconds=20)
-       
-        timeStampList = []
+        #one timestamp every 20 seconds from the start date
+        self.interpolatedDataFrame['Interpolated TimeStamps'] = pd.date_range(startDate, periods=int(self.nPoints), freq=pd.Timedelta(seconds=20))
         
-        for i in range(int(self.nPoints)):
-            timeStampList.append(startDate)
-            startDate += timeDelta
-            
-            
-        self.interpolatedDataFrame['Interpolated TimeStamps'] = timeStampList
+        #point 1 and point 2 are the fixes for .position()
+        if self.hoursToPoint2 > 0:
+            self.setTrackFixes([startDate, startDate + pd.Timedelta(hours=self.hoursToPoint2)], [self.lat1, self.lat2], [self.lon1, self.lon2])
+    
+    def setTrackFixes(self, times, lats, lons):
+        """
+        
+
+        Parameters
+        ----------
+        times : array of datetimes
+            Increasing times of the storm fixes, at least two. 
+        lats : array of Float
+            Latitude of the storm at each fix. 
+        lons : array of Float
+            Longitude of the storm at each fix. 
+
+        Returns
+        -------
+        Self.
+            Sets the fixes .position() interpolates between. 
+
+        """
+        if len(times) < 2:
+            raise ValueError('At least two fixes are needed to locate the storm.')
+        
+        self.fixTimes = pd.DatetimeIndex(times)
+        self.fixLats = np.asarray(lats, dtype=float)
+        self.fixLons = np.asarray(lons, dtype=float)
+    
+    def setPositionMethod(self, method='linear'):
+        """
+        
+
+        Parameters
+        ----------
+        method : Str
+            'linear', 'geodesic' or 'spline'. Default is 'linear'. 
+
+        Returns
+        -------
+        Self.
+            Sets how .position() interpolates between the fixes. 
+
+        """
+        if method not in positionMethods:
+            raise ValueError('Unknown method {}, use one of {}'.format(method, positionMethods))
+        
+        self.positionMethod = method
+    
+    def getFixes(self):
+        """
+        
+
+        Returns
+        -------
+        Tuple
+            The (times, lats, lons) of the storm fixes. If no fixes were set the 
+            points of the interpolated dataframe are used. 
+
+        """
+        if self.fixTimes is not None:
+            return self.fixTimes, self.fixLats, self.fixLons
+        
+        df = self.interpolatedDataFrame
+        
+        return pd.DatetimeIndex(df['Interpolated TimeStamps']), df['Interpolated Lats'].values, df['Interpolated Lons'].values
+    
+    def position(self, times):
+        """
+        
+
+        Parameters
+        ----------
+        times : array of datetimes
+            The times to locate the storm at, ex:
+                the scan midpoint of every GLM file
+
+        Returns
+        -------
+        Tuple of numpy arrays
+            The (lats, lons) of the storm at every time in one vectorized call, 
+            nan outside of the fixes. 
+
+        """
+        fixTimes, fixLats, fixLons = self.getFixes()
+        
+        return interpolatePositions(times, fixTimes, fixLats, fixLons, self.positionMethod)
     
+    def locateFiles(self, filesDataFrame):
+        """
+        
+
+        Parameters
+        ----------
+        filesDataFrame : Pandas DataFrame
+            A dataframe of GLM files with File Scan Begin Time and File Scan End 
+            Time columns, as made by .parseFileNames() 
+
+        Returns
+        -------
+        Pandas DataFrame
+            The files whose scan midpoint falls between the first and last fix, 
+            sorted by midpoint, with the storm position at the midpoint from 
+            .position() in Interpolated Lats and Interpolated Lons, the time it 
+            was evaluated at in Interpolated TimeStamps, the Storm Heading over the 
+            minute around the midpoint and the Segment of the track. 
+
+        """
+        fixTimes, fixLats, fixLons = self.getFixes()
+        fixNs = toNanoseconds(fixTimes)
+        
+        files = filesDataFrame.copy()
+        files['File Scan Mid Time'] = files['File Scan Begin Time'] + (files['File Scan End Time'] - files['File Scan Begin Time']) / 2
+        files = files.sort_values(by='File Scan Mid Time')
+        midNs = toNanoseconds(files['File Scan Mid Time'])
+        located = files[(midNs >= fixNs[0]) & (midNs <= fixNs[-1])].reset_index(drop=True)
+        midNs = toNanoseconds(located['File Scan Mid Time'])
+        
+        #the position of the storm at the midpoint of each scan
+        lats, lons = self.position(midNs)
+        located['Interpolated TimeStamps'] = located['File Scan Mid Time']
+        located['Interpolated Lats'] = lats
+        located['Interpolated Lons'] = lons
+        
+        #the heading from 30 seconds before to 30 seconds after the midpoint
+        latsBefore, lonsBefore = self.position(np.clip(midNs - 30 * 10**9, fixNs[0], fixNs[-1]))
+        latsAfter, lonsAfter = self.position(np.clip(midNs + 30 * 10**9, fixNs[0], fixNs[-1]))
+        located['Storm Heading'] = bearingDegrees(latsBefore, lonsBefore, latsAfter, lonsAfter)
+        located['Segment'] = np.clip(np.searchsorted(fixNs, midNs, side='right') - 1, 0, len(fixNs) - 2)
+        
+        return located
         
     def plotInterpolation(self):
         """
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Order File
+
+Purpose: This class puts the results of files counted out of order back in
+scan order before they are handed over, so the writer, the aggregator and the
+dataDictionary of a Driver always receive the scans in time order whichever
+file finishes first.
+
+The keys of the files are given in scan order with expect(), in one or more
+parts, and every result is given with add() as it is counted. A result is held
+until every file before it has been handed over, then passed to handOver and
+dropped, so only the results after the first gap are kept:
+
+    order = ScanOrder(handOver, parts=3)
+    order.expect(keysOfHour, part=1)
+    order.add(key, fileResults)
+
+Parts may be expected in any order, ex: hours listed at the same time, but
+nothing of a part is handed over before the parts ahead of it.
+
+Methods:
+    __init__()
+    expect()
+    add()
+
+For a list of method descriptions:
+    help(ScanOrder)
+
+@author: coreywalker
+"""
+
+
+class ScanOrder():
+
+    def __init__(self, handOver, parts=1):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        handOver : Function
+            Called with the results of every file, in scan order.
+        parts : Int
+            The number of parts the keys are expected in. Default is 1.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.handOver = handOver #called with the results of every file in scan order
+        self.keys = [None] * parts #the keys of every part in scan order, None until expected
+        self.results = {} #the results waiting for the files before them keyed by file key
+        self.part = 0 #the part of the next file to hand over
+        self.row = 0 #the row in that part of the next file to hand over
+
+    def expect(self, keys, part=0):
+        """
+
+
+        Parameters
+        ----------
+        keys : List
+            The keys of the files of the part, in scan order.
+        part : Int
+            The part the keys belong to. Default is 0.
+
+        Returns
+        -------
+        Self.
+            Keeps the keys and hands over the results already waiting for them.
+
+        """
+        self.keys[part] = list(keys)
+        self._handOverReady()
+
+    def add(self, key, fileResults):
+        """
+
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of a counted file.
+        fileResults : List
+            The (time, lat, lon, flashCount, extraColumns) results of the file.
+
+        Returns
+        -------
+        Self.
+            Hands over the results of the file, and of the files waiting on it,
+            once every file before it has been handed over.
+
+        """
+        self.results[key] = fileResults
+        self._handOverReady()
+
+    def _handOverReady(self):
+        """
+
+
+        Returns
+        -------
+        Self.
+            Hands over the results up to the first file not counted yet, or
+            the first part not expected yet.
+
+        """
+        while self.part < len(self.keys) and self.keys[self.part] is not None:
+            keys = self.keys[self.part]
+            if self.row == len(keys):
+                self.part += 1
+                self.row = 0
+                continue
+            if keys[self.row] not in self.results:
+                return
+            self.handOver(self.results.pop(keys[self.row]))
+            self.row += 1
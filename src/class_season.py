@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Season File
+
+Purpose: This class counts the lightning of many storms at once. In a busy
+season several storms are active in the same hours, and running one Track per
+storm would list, download and open the same hourly GLM files once per storm.
+
+The Season turns the tracks around. Every storm is interpolated and matched to
+the GLM files the same way a Track is, and the matches are gathered per file
+into a list of (storm, time, lat, lon, heading) queries. Each hourly bucket is
+then listed once, each file is downloaded once, and each file is opened once
+with every storm's box answered from the same arrays. The work grows with the
+hours the season covers, not with storms times hours.
+
+Methods:
+    __init__()
+    addStorms()
+    planSeason()
+    checkSettings()
+    getGLMData()
+    processSeason()
+    makeSeasonDataFrame()
+    run()
+
+For a list of method descriptions:
+    help(Season)
+
+@author: coreywalker
+"""
+
+from class_driver import Driver
+from class_command import Command
+from class_track import Track, readIBTrACS
+from flash_count import countFlashesForFile, countFlashesInWorker, initWorker, reader
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from timeit import default_timer as timer
+import os
+import pandas as pd
+
+
+class Season(Driver):
+
+    def __init__(self):
+        """
+        constructor for class attributes.
+
+        Returns
+        -------
+        Self.
+
+        """
+        Driver.__init__(self)
+        self.tracks = [] #a Track of every storm in the season
+        self.queries = {} #a list of (storm, time, lat, lon, heading, segment) queries keyed by GLM key
+        self.seasonResults = [] #a (storm, segment, time, lat, lon, flashCount, extraColumns) tuple per storm scan
+        self.seasonDataFrame = pd.DataFrame() #one row per storm scan with the storm id and name
+
+    def addStorms(self, fileName, sids=None, season=None):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            Path to an IBTrACS CSV. The file is read once for every storm.
+        sids : List
+            The storm ids to add, ex:
+                ['2021140N30305', '2021170N25272']
+            Default is None, which adds every storm of the season.
+        season : Int
+            The season the storms are taken from, ex:
+                2021
+            Default is None.
+
+        Returns
+        -------
+        List
+            Interpolates the track of every storm and adds it to self.tracks.
+            Storms with fewer than two fixes have no track and are left out.
+
+        """
+        ibtracs = readIBTrACS(fileName)
+        if season is not None:
+            ibtracs = ibtracs[ibtracs['SEASON'].astype(int) == season]
+        if sids is None:
+            sids = list(ibtracs['SID'].unique())
+
+        for sid in sids:
+            track = Track()
+            track.selectTrack(ibtracs, sid=sid)
+            if len(track.trackDataFrame) < 2:
+                continue
+            track.interpolateTrack()
+            track.createDownloadList()
+            self.tracks.append(track)
+
+        print('Added {} storms to the season.'.format(len(self.tracks)))
+        print('\n')
+
+    def planSeason(self):
+        """
+
+
+        Returns
+        -------
+        Dictionary
+            Lists every hourly bucket needed by any storm once, matches the
+            listed files to every storm with .locateFiles(), and stores the
+            queries of each file in self.queries. The files needed by at least
+            one storm are stored in self.downloadPlan.
+
+        """
+        #every hour of every storm, each listed once
+        self.lookupList = sorted(set(prefix for track in self.tracks for prefix in track.lookupList))
+        objects = self.listLookupObjects()
+        sizes = dict(objects)
+
+        keysDataFrame = self.parseFileNames([obj[0] for obj in objects])
+
+        self.queries = {}
+        nStormFiles = 0
+        for storm, track in enumerate(self.tracks):
+            located = track.locateFiles(keysDataFrame)
+            nStormFiles += len(located)
+            for key, time, lat, lon, heading, segment in zip(located['File Name'], located['File Scan Begin Time'], located['Interpolated Lats'],
+                                                             located['Interpolated Lons'], located['Storm Heading'], located['Segment']):
+                self.queries.setdefault(key, []).append((storm, time, lat, lon, heading, segment))
+
+        self.downloadPlan = [(key, sizes[key]) for key in sorted(self.queries)]
+
+        print('Planned {} files for {} storms, one Track per storm would download {} files.'.format(len(self.downloadPlan), len(self.tracks), nStormFiles))
+        print('\n')
+
+    def checkSettings(self):
+        """
+
+
+        Returns
+        -------
+        Self.
+            Raises a ValueError for the settings a season cannot be counted
+            with. The checkpoint and writer of a Driver are keyed to a single
+            storm track and a season has one per storm, and the per-flash
+            timing needs one storm center per flash.
+
+        """
+        if self.checkpoint is not None or self.writer is not None:
+            raise ValueError('A season is counted for several storm tracks at once, a checkpoint or writer is not supported.')
+        if self.perFlash:
+            raise ValueError('A season is counted with one storm center per scan, per-flash timing is not supported.')
+
+    def getGLMData(self, workers=16):
+        """
+
+
+        Parameters
+        ----------
+        workers : Int
+            The maximum number of files transferred at the same time. Default
+            is 16.
+
+        Returns
+        -------
+        Filled Directory
+            Runs Command.getGLMData() once the settings are checked with
+            .checkSettings(), so an unsupported setting fails before anything
+            is downloaded.
+
+        """
+        self.checkSettings()
+
+        Command.getGLMData(self, workers)
+
+    def processSeason(self, parallel=False, workers=None):
+        """
+
+
+        Parameters
+        ----------
+        parallel : Bool
+            If True the files are counted on a pool of processes. Default is
+            False.
+        workers : Int
+            The number of worker processes used when parallel is True. Default
+            is None, which uses one worker per core.
+
+        Returns
+        -------
+        List
+            Opens every file of self.downloadPlan once and counts the box of
+            every storm asked of it from the same arrays, storing the results
+            in self.seasonResults. Files asked by several storms are answered
+            from a FlashIndex like a file asked for several scans.
+
+        """
+        self.checkSettings()
+
+        keys = sorted(self.queries)
+        tasks = [(os.path.join(self.filepath, os.path.basename(key)), [query[1:5] for query in self.queries[key]]) for key in keys]
+
+        print('Processing {} netCDF files for {} storms now!'.format(len(tasks), len(self.tracks)))
+        print('\n')
+
+        settings = self.countSettings()
+        reader.resetTimings()
+        self.instrument.start('processSeason', parallel=parallel, storms=len(self.tracks))
+        start = timer()
+
+        if parallel:
+            if workers is None:
+                workers = os.cpu_count()
+            #the settings go to each worker once, not with every file
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(settings,))
+            results = executor.map(countFlashesInWorker, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+        else:
+            executor = None
+            results = map(partial(countFlashesForFile, **settings), tasks)
+
+        self.seasonResults = []
+        try:
+            for fileCount, (key, fileResults) in enumerate(zip(keys, results), 1):
+                self.instrument.progress('processSeason', fileCount, len(keys))
+                for query, (time, lat, lon, flashCount, extraColumns) in zip(self.queries[key], fileResults):
+                    self.seasonResults.append((query[0], query[5], time, lat, lon, flashCount, extraColumns))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        seconds = timer() - start
+        self.instrument.end('processSeason', files=len(tasks), flashes=None if parallel else reader.nFlashes, scans=len(self.seasonResults))
+        print('Counted {} files for {} storm scans in {:.2f} s ({:.1f} files/s)'.format(
+            len(tasks), len(self.seasonResults), seconds, len(tasks) / max(seconds, 1e-9)))
+        if not parallel:
+            reader.printTimings()
+
+    def makeSeasonDataFrame(self):
+        """
+
+
+        Returns
+        -------
+        Pandas DataFrame
+            Builds self.seasonDataFrame from self.seasonResults, one row per
+            storm scan with the Storm ID, Storm Name, Segment, Time of Scan,
+            Flash Count, Latitude and Longitude, followed by the extra radius,
+            ring and quadrant columns, sorted by storm and time.
+
+        """
+        rows = []
+        for storm, segment, time, lat, lon, flashCount, extraColumns in self.seasonResults:
+            row = {'Storm ID': self.tracks[storm].stormID, 'Storm Name': self.tracks[storm].stormName, 'Segment': segment,
+                   'Time of Scan': time, 'Flash Count': flashCount, 'Latitude': lat, 'Longitude': lon}
+            row.update(extraColumns)
+            rows.append(row)
+
+        columns = ['Storm ID', 'Storm Name', 'Segment', 'Time of Scan', 'Flash Count', 'Latitude', 'Longitude']
+        self.seasonDataFrame = pd.DataFrame(rows, columns=columns + [column for column in (rows[0] if rows else {}) if column not in columns])
+        self.seasonDataFrame = self.seasonDataFrame.sort_values(by=['Storm ID', 'Time of Scan']).reset_index(drop=True)
+
+    def run(self, fileName, sids=None, season=None, parallel=False, workers=16):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            Path to an IBTrACS CSV.
+        sids : List
+            The storm ids to count. Default is None, every storm of the season.
+        season : Int
+            The season the storms are taken from. Default is None.
+        parallel : Bool
+            If True the files are counted on a pool of processes. Default is
+            False.
+        workers : Int
+            The number of concurrent downloads. Default is 16.
+
+        Returns
+        -------
+        Pandas DataFrame
+            Runs the whole pipeline for every storm and returns
+            self.seasonDataFrame.
+
+        """
+        self.addStorms(fileName, sids, season)
+        self.planSeason()
+        self.getGLMData(workers)
+        self.processSeason(parallel=parallel)
+        self.makeSeasonDataFrame()
+
+        return self.seasonDataFrame
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Synthetic File
+
+Purpose: This class writes synthetic GLM L2 LCFA netCDFs, laid out like the
+noaa-goes16 bucket, so the whole pipeline can be run and timed with no
+network. Each file holds the flash variables the counting code reads
+(flash_lat, flash_lon, flash_time_offset_of_first_event, flash_energy and
+flash_area) packed the way the real product packs them, a number_of_flashes
+dimension and a time_coverage_start attribute, and is named with the same
+scan begin, end and creation times as a real file.
+
+The number of flashes in each file is drawn around flashesPerFile. A share of
+them is clustered around storm centers with a normal spread and the rest is
+spread uniformly over the GOES-East field of view.
+
+A directory written by this class can be read with LocalBucket:
+
+    synthetic = SyntheticGLM('/tmp/bucket')
+    synthetic.makeFiles(datetime(2021, 5, 20), 540, clusters=[(30.5, -55.3)])
+    obj.bucket = LocalBucket('/tmp/bucket')
+
+Methods:
+    __init__()
+    fileName()
+    writeFile()
+    makeFiles()
+
+For a list of method descriptions:
+    help(SyntheticGLM)
+
+@author: coreywalker
+"""
+
+import os
+import numpy as np
+import netCDF4 as nc
+from datetime import timedelta
+
+#the latitudes and longitudes GOES-East sees
+fieldOfView = (-66.0, 66.0, -141.0, -9.0)
+
+
+class SyntheticGLM():
+
+    def __init__(self, rootDir, seed=0):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        rootDir : Str
+            The directory standing in for the bucket. Files are written under
+            GLM-L2-LCFA/<year>/<day of year>/<hour>/ like the real bucket.
+        seed : Int
+            The seed of the random flashes, so a run can be repeated exactly.
+            Default is 0.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.rootDir = rootDir #directory the files are written to
+        self.rng = np.random.default_rng(seed) #random generator of the flashes
+        self.nFlashes = 0 #the number of flashes written so far
+
+    def fileName(self, start):
+        """
+
+
+        Parameters
+        ----------
+        start : datetime
+            The scan begin time of the file.
+
+        Returns
+        -------
+        Str
+            The key of the file relative to self.rootDir, ex:
+                GLM-L2-LCFA/2021/140/00/OR_GLM-L2-LCFA_G16_s20211400000000_e20211400000200_c20211400000227.nc
+
+        """
+        end = start + timedelta(seconds=20)
+        creation = end + timedelta(seconds=27)
+
+        def glmTime(t):
+            return t.strftime('%Y%j%H%M%S') + str(t.microsecond // 100000)
+
+        name = 'OR_GLM-L2-LCFA_G16_s{}_e{}_c{}.nc'.format(glmTime(start), glmTime(end), glmTime(creation))
+
+        return '{}/{}/{:03d}/{:02d}/{}'.format('GLM-L2-LCFA', start.year, start.timetuple().tm_yday, start.hour, name)
+
+    def writeFile(self, path, start, lats, lons):
+        """
+
+
+        Parameters
+        ----------
+        path : Str
+            The netCDF file to write.
+        start : datetime
+            The scan begin time of the file.
+        lats : numpy array
+            Latitudes of the flashes.
+        lons : numpy array
+            Longitudes of the flashes.
+
+        Returns
+        -------
+        netCDF File
+            Writes the flashes with random first event times, energies and
+            areas, packed with the scale factors of the real product.
+
+        """
+        n = len(lats)
+        with nc.Dataset(path, 'w') as ds:
+            ds.createDimension('number_of_flashes', n)
+            ds.time_coverage_start = start.strftime('%Y-%m-%dT%H:%M:%S.') + '{}Z'.format(start.microsecond // 100000)
+
+            lat = ds.createVariable('flash_lat', 'f4', ('number_of_flashes',), fill_value=-999.0)
+            lat[:] = lats
+            lon = ds.createVariable('flash_lon', 'f4', ('number_of_flashes',), fill_value=-999.0)
+            lon[:] = lons
+
+            #unsigned 16 bit integers with a scale and offset, like the real product
+            offset = ds.createVariable('flash_time_offset_of_first_event', 'u2', ('number_of_flashes',), fill_value=65535)
+            offset.scale_factor = 0.0003814756
+            offset.add_offset = -5.0
+            offset[:] = self.rng.uniform(0, 20, n)
+
+            energy = ds.createVariable('flash_energy', 'u2', ('number_of_flashes',), fill_value=65535)
+            energy.scale_factor = 1.5e-15
+            energy[:] = self.rng.uniform(0, 1e-11, n)
+
+            area = ds.createVariable('flash_area', 'u2', ('number_of_flashes',), fill_value=65535)
+            area.scale_factor = 152601.9
+            area[:] = self.rng.uniform(0, 1e9, n)
+
+        self.nFlashes += n
+
+    def makeFiles(self, start, nFiles, flashesPerFile=300, clusters=None, spread=3.0, clustered=0.8):
+        """
+
+
+        Parameters
+        ----------
+        start : datetime
+            The scan begin time of the first file. Files follow every 20
+            seconds.
+        nFiles : Int
+            The number of files to write, ex: 540 for three hours.
+        flashesPerFile : Int
+            The mean number of flashes in a file. Default is 300.
+        clusters : List
+            (lat, lon) storm centers the clustered flashes are drawn around.
+            Default is None, which puts every flash in the field of view
+            uniformly.
+        spread : Float
+            The standard deviation in degrees of the flashes around a center.
+            Default is 3.0.
+        clustered : Float
+            The share of the flashes drawn around the centers. Default is 0.8.
+
+        Returns
+        -------
+        List
+            Writes the files and returns their keys relative to self.rootDir.
+
+        """
+        minLat, maxLat, minLon, maxLon = fieldOfView
+        keys = []
+
+        for i in range(nFiles):
+            scanStart = start + timedelta(seconds=20 * i)
+            n = int(self.rng.poisson(flashesPerFile))
+
+            nClustered = int(round(n * clustered)) if clusters else 0
+            centers = np.array(clusters)[self.rng.integers(0, len(clusters), nClustered)] if nClustered else np.zeros((0, 2))
+            lats = np.concatenate([self.rng.normal(centers[:, 0], spread), self.rng.uniform(minLat, maxLat, n - nClustered)])
+            lons = np.concatenate([self.rng.normal(centers[:, 1], spread), self.rng.uniform(minLon, maxLon, n - nClustered)])
+
+            key = self.fileName(scanStart)
+            path = os.path.join(self.rootDir, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.writeFile(path, scanStart, lats, lons)
+            keys.append(key)
+
+        return keys
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Track File
+
+Purpose: This class extends the Driver from one pair of storm points to a whole
+storm track. An IBTrACS best-track CSV is read, every pair of consecutive fixes
+becomes a straight line segment interpolated every 20 seconds, and all of the
+segments share one interpolated dataframe. The GLM files needed by the whole
+track are then planned, downloaded and processed once, so hours shared by two
+segments are never downloaded or opened twice.
+
+IBTrACS CSVs can be downloaded here:
+
+    https://www.ncei.noaa.gov/products/international-best-track-archive
+
+Functions:
+    readIBTrACS()
+
+Methods:
+    __init__()
+    readTrack()
+    selectTrack()
+    interpolateTrack()
+    makeTrackDataFrame()
+    run()
+
+For a list of method descriptions:
+    help(Track)
+
+@author: coreywalker
+"""
+
+from class_driver import Driver
+from flash_count import bearingDegrees
+import numpy as np
+import pandas as pd
+
+
+def readIBTrACS(fileName):
+    """
+
+
+    Parameters
+    ----------
+    fileName : Str
+        Path to an IBTrACS CSV, ex:
+            ibtracs.ALL.list.v04r00.csv
+
+    Returns
+    -------
+    Pandas DataFrame
+        The SID, SEASON, NAME, ISO_TIME, LAT and LON columns of every row of
+        the file.
+
+    """
+    #the second row of an IBTrACS CSV holds the units of each column
+    return pd.read_csv(fileName, skiprows=[1], usecols=['SID', 'SEASON', 'NAME', 'ISO_TIME', 'LAT', 'LON'],
+                       keep_default_na=False, low_memory=False)
+
+
+class Track(Driver):
+
+    def __init__(self):
+        """
+        constructor for class attributes.
+
+        Returns
+        -------
+        Self.
+
+        """
+        Driver.__init__(self)
+        self.trackDataFrame = pd.DataFrame() #a dataframe of the best-track fixes with Time, Lat and Lon columns. Default is empty.
+        self.stormName = '' #the NAME of the storm in the IBTrACS file
+        self.stormID = '' #the SID of the storm in the IBTrACS file
+
+    def readTrack(self, fileName, sid=None, name=None, season=None):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            Path to an IBTrACS CSV, ex:
+                ibtracs.ALL.list.v04r00.csv
+        sid : Str
+            The storm id to keep, ex:
+                2021140N30305
+            Default is None.
+        name : Str
+            The storm name to keep, ex:
+                ANA
+            Default is None.
+        season : Int
+            The season to keep when a name is reused across years, ex:
+                2021
+            Default is None.
+
+        Returns
+        -------
+        Pandas DataFrame
+            Stores the fixes of the selected storm, sorted by time, in
+            self.trackDataFrame. If the file holds more than one storm, pass
+            sid or name to pick one.
+
+        """
+        self.selectTrack(readIBTrACS(fileName), sid, name, season)
+
+    def selectTrack(self, ibtracs, sid=None, name=None, season=None):
+        """
+
+
+        Parameters
+        ----------
+        ibtracs : Pandas DataFrame
+            The rows of an IBTrACS CSV as returned by readIBTrACS(), so a file
+            holding many storms is only read once.
+        sid : Str
+            The storm id to keep. Default is None.
+        name : Str
+            The storm name to keep. Default is None.
+        season : Int
+            The season to keep. Default is None.
+
+        Returns
+        -------
+        Pandas DataFrame
+            Stores the fixes of the selected storm, sorted by time, in
+            self.trackDataFrame.
+
+        """
+        if sid is not None:
+            ibtracs = ibtracs[ibtracs['SID'] == sid]
+        if name is not None:
+            ibtracs = ibtracs[ibtracs['NAME'] == name.upper()]
+        if season is not None:
+            ibtracs = ibtracs[ibtracs['SEASON'].astype(int) == season]
+
+        if ibtracs['SID'].nunique() != 1:
+            raise ValueError('The IBTrACS rows hold {} storms, pass sid or name to pick one.'.format(ibtracs['SID'].nunique()))
+
+        self.stormID = ibtracs['SID'].iloc[0]
+        self.stormName = ibtracs['NAME'].iloc[0]
+
+        self.trackDataFrame = pd.DataFrame()
+        self.trackDataFrame['Time'] = pd.to_datetime(ibtracs['ISO_TIME']).values
+        self.trackDataFrame['Lat'] = ibtracs['LAT'].astype(float).values
+        self.trackDataFrame['Lon'] = ibtracs['LON'].astype(float).values
+        self.trackDataFrame = self.trackDataFrame.drop_duplicates(subset='Time').sort_values(by='Time').reset_index(drop=True)
+
+    def interpolateTrack(self):
+        """
+
+
+        Returns
+        -------
+        Pandas DataFrame
+            Interpolates every pair of consecutive fixes in self.trackDataFrame
+            into a straight line with one point every 20 seconds, the same way
+            the single pair Driver does, and stores all of the segments in
+            self.interpolatedDataFrame with a Segment column numbering them and
+            the Storm Heading of each segment. The fixes are also handed to
+            .setTrackFixes() so every file can be located with .position().
+
+        """
+        fixes = self.trackDataFrame
+        segments = []
+
+        for i in range(len(fixes) - 1):
+            start = fixes['Time'].iloc[i]
+            hoursToPoint2 = (fixes['Time'].iloc[i + 1] - start).total_seconds() / 3600
+
+            #the storm is scanned every 20 seconds between the two fixes
+            nPoints = int(hoursToPoint2 * 3600 / 20)
+
+            segment = pd.DataFrame()
+            segment['Interpolated Lats'] = np.linspace(fixes['Lat'].iloc[i], fixes['Lat'].iloc[i + 1], nPoints)
+            segment['Interpolated Lons'] = np.linspace(fixes['Lon'].iloc[i], fixes['Lon'].iloc[i + 1], nPoints)
+            segment['Interpolated TimeStamps'] = pd.date_range(start, periods=nPoints, freq=pd.Timedelta(seconds=20))
+            segment['Storm Heading'] = bearingDegrees(fixes['Lat'].iloc[i], fixes['Lon'].iloc[i], fixes['Lat'].iloc[i + 1], fixes['Lon'].iloc[i + 1])
+            segment['Segment'] = i
+            segments.append(segment)
+
+        self.interpolatedDataFrame = pd.concat(segments, ignore_index=True)
+        self.setTrackFixes(fixes['Time'], fixes['Lat'], fixes['Lon'])
+        self.newLats = self.interpolatedDataFrame['Interpolated Lats'].values
+        self.newLons = self.interpolatedDataFrame['Interpolated Lons'].values
+        self.nPoints = len(self.interpolatedDataFrame)
+        self.lat1, self.lon1 = fixes['Lat'].iloc[0], fixes['Lon'].iloc[0]
+        self.lat2, self.lon2 = fixes['Lat'].iloc[-1], fixes['Lon'].iloc[-1]
+
+    def makeTrackDataFrame(self):
+        """
+
+
+        Returns
+        -------
+        Pandas DataFrame
+            Builds self.processedDataFrame from self.dataDictionary like
+            .makeFlashDataFrame() and adds the storm id, storm name and segment
+            of every scan, giving one tidy dataframe for the whole track.
+
+        """
+        self.processedDataFrame = pd.DataFrame()
+        self.makeFlashDataFrame()
+
+        segments = self.mergedDataFrame.set_index('File Scan Begin Time')['Segment']
+        self.processedDataFrame['Segment'] = self.processedDataFrame['Time of Scan'].map(segments).values
+        self.processedDataFrame['Storm ID'] = self.stormID
+        self.processedDataFrame['Storm Name'] = self.stormName
+
+    def run(self, fileName, sid=None, name=None, season=None, stream=False, inMemory=False, parallel=False, workers=16):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            Path to an IBTrACS CSV.
+        sid : Str
+            The storm id to keep. Default is None.
+        name : Str
+            The storm name to keep. Default is None.
+        season : Int
+            The season to keep. Default is None.
+        stream : Bool
+            If True the files are counted as they are fetched with
+            .streamNetCDFs() instead of downloading everything first. Default is False.
+        inMemory : Bool
+            If True and stream is True, the files are never written to disk.
+            Default is False.
+        parallel : Bool
+            If True and stream is False, the files are counted on a process pool.
+            Default is False.
+        workers : Int
+            The number of concurrent downloads. Default is 16.
+
+        Returns
+        -------
+        Pandas DataFrame
+            Runs the whole pipeline for the storm and returns
+            self.processedDataFrame with one row per GLM scan along the track.
+
+        """
+        self.readTrack(fileName, sid, name, season)
+        self.interpolateTrack()
+        self.createDownloadStartStopString()
+        self.createDownloadList()
+        self.planDownloads()
+
+        if stream:
+            self.streamNetCDFs(workers=workers, inMemory=inMemory)
+        else:
+            self.getGLMData(workers)
+            #only the planned files of this track, even if the data folder holds others
+            self.filesDataFrame = self.parseFileNames([self.filepath + key.split('/')[-1] for key, size in self.downloadPlan])
+            self.merge()
+            self.processNetCDFs(parallel=parallel)
+
+        self.makeTrackDataFrame()
+
+        return self.processedDataFrame
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class Writer File
+
+Purpose: This class writes the flash counts of a run to disk as they are
+made, instead of keeping every scan in memory until the end. Rows are kept in
+a small buffer and appended to one CSV per day of scans, ex:
+
+    results/2021-05-20.csv
+
+so a crash loses at most the rows still in the buffer, a long run never holds
+the whole result in memory, and a restarted run can carry on after the last
+scan written with .lastWrittenTime(). Reading back a season is one
+pd.read_csv per day with .read().
+
+Rows are expected in scan time order, which is how the Driver hands them
+over, so the last row of the newest file is the last scan written.
+
+The storm track and count settings of the run are kept in run.json next to
+the day files. A run with another storm or other settings is refused, so it
+can neither resume after nor read back the rows of a different run.
+
+Methods:
+    __init__()
+    useSettings()
+    write()
+    flush()
+    lastWrittenTime()
+    read()
+    close()
+
+For a list of method descriptions:
+    help(ResultWriter)
+
+@author: coreywalker
+"""
+
+import os
+import csv
+import json
+import pandas as pd
+
+#the columns every row starts with, the extra columns of a run follow them
+baseColumns = ['Time of Scan', 'Flash Count', 'Latitude', 'Longitude']
+
+
+class ResultWriter():
+
+    def __init__(self, outputDir=os.getcwd() + '/results/', bufferSize=100):
+        """
+        constructor containing attributes for the class.
+
+        Parameters
+        ----------
+        outputDir : Str
+            The directory the daily CSV files are written to. Default is
+            ./results/
+        bufferSize : Int
+            The number of rows kept in memory before they are appended to
+            disk. Default is 100.
+
+        Returns
+        -------
+        Self.
+
+        """
+        self.outputDir = outputDir #directory holding one CSV per day of scans
+        self.bufferSize = bufferSize #rows kept before a flush
+        self.buffer = [] #rows not yet on disk
+        self.columns = None #the header of the run, set by the first row
+        self.settingsFile = os.path.join(self.outputDir, 'run.json') #the storm and settings the rows were made with
+        os.makedirs(self.outputDir, exist_ok=True)
+
+    def useSettings(self, settings):
+        """
+
+
+        Parameters
+        ----------
+        settings : Dictionary
+            The track and count settings of the run, ex:
+                {'track': '3f2a...', 'geometry': 'degree', 'size': 1, 'radii': None}
+
+        Returns
+        -------
+        Self.
+            Records the settings in self.settingsFile when nothing has been
+            written yet. Raises a ValueError when the day files were written
+            by a run with another storm or other settings.
+
+        """
+        #compare the settings the way they read back from the file
+        settings = json.loads(json.dumps(settings))
+        if os.path.exists(self.settingsFile):
+            with open(self.settingsFile) as f:
+                written = json.load(f)
+            if written == settings:
+                return
+            if self._dayFiles():
+                raise ValueError('{} holds the results of another storm or other settings, write this run to another directory.'.format(self.outputDir))
+
+        with open(self.settingsFile, 'w') as f:
+            json.dump(settings, f)
+
+    def write(self, time, lat, lon, flashCount, extraColumns=None):
+        """
+
+
+        Parameters
+        ----------
+        time : Timestamp
+            The scan time.
+        lat : Float
+            Latitude of the storm at the scan.
+        lon : Float
+            Longitude of the storm at the scan.
+        flashCount : Int
+            The flashes counted for the scan.
+        extraColumns : Dictionary
+            The counts of extra radii, rings and quadrants keyed by column
+            name. Default is None.
+
+        Returns
+        -------
+        Self.
+            Adds the row to the buffer and flushes the buffer when it is full.
+
+        """
+        extraColumns = extraColumns or {}
+        if self.columns is None:
+            self.columns = baseColumns + list(extraColumns)
+
+        self.buffer.append([pd.Timestamp(time), flashCount, lat, lon] + [extraColumns[column] for column in self.columns[4:]])
+        if len(self.buffer) >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        """
+
+
+        Returns
+        -------
+        CSV Files
+            Appends the buffered rows to the CSV of their day. A day file is
+            given a header when it is created, and a last line cut short by
+            a crash is dropped before anything is appended to it.
+
+        """
+        days = {}
+        for row in self.buffer:
+            days.setdefault(row[0].strftime('%Y-%m-%d'), []).append(row)
+
+        for day, rows in days.items():
+            fileName = os.path.join(self.outputDir, day + '.csv')
+            if os.path.exists(fileName):
+                self._dropPartialLine(fileName)
+            newFile = not os.path.exists(fileName) or os.path.getsize(fileName) == 0
+
+            with open(fileName, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if newFile:
+                    writer.writerow(self.columns)
+                writer.writerows(rows)
+
+        self.buffer = []
+
+    def lastWrittenTime(self):
+        """
+
+
+        Returns
+        -------
+        Timestamp
+            The time of the last scan on disk, read from the end of the newest
+            day file, or None if nothing has been written yet.
+
+        """
+        for fileName in sorted(self._dayFiles(), reverse=True):
+            with open(fileName, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - 65536))
+                lines = f.read().split(b'\n')
+
+            #the last line may be empty or cut short, the one before it is whole
+            for line in reversed(lines[:-1] if size else []):
+                field = line.split(b',')[0].decode()
+                if field and field != baseColumns[0]:
+                    return pd.Timestamp(field)
+
+        return None
+
+    def read(self, start=None, end=None):
+        """
+
+
+        Parameters
+        ----------
+        start : Timestamp
+            The earliest scan to return. Default is None, no limit.
+        end : Timestamp
+            The latest scan to return. Default is None, no limit.
+
+        Returns
+        -------
+        Pandas DataFrame
+            Every row written between start and end, sorted by scan time, with
+            the same columns as Driver.makeFlashDataFrame(). Only the day files
+            in the range are read.
+
+        """
+        self.flush()
+
+        frames = []
+        for fileName in sorted(self._dayFiles()):
+            day = pd.Timestamp(os.path.basename(fileName)[:-len('.csv')])
+            if start is not None and day < pd.Timestamp(start).normalize():
+                continue
+            if end is not None and day > pd.Timestamp(end):
+                continue
+            frames.append(pd.read_csv(fileName, parse_dates=[baseColumns[0]]))
+
+        if not frames:
+            return pd.DataFrame(columns=self.columns or baseColumns)
+
+        df = pd.concat(frames, ignore_index=True)
+        #the resolution of the in-memory counts, newer pandas parses dates to microseconds
+        df[baseColumns[0]] = df[baseColumns[0]].astype('datetime64[ns]')
+        if start is not None:
+            df = df[df[baseColumns[0]] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df[baseColumns[0]] <= pd.Timestamp(end)]
+
+        return df.sort_values(by=baseColumns[0]).reset_index(drop=True)
+
+    def close(self):
+        """
+
+
+        Returns
+        -------
+        CSV Files
+            Writes any buffered rows to disk.
+
+        """
+        self.flush()
+
+    def _dayFiles(self):
+        """
+
+
+        Returns
+        -------
+        List
+            The paths of every day file in self.outputDir.
+
+        """
+        return [entry.path for entry in os.scandir(self.outputDir) if entry.name.endswith('.csv')]
+
+    def _dropPartialLine(self, fileName):
+        """
+
+
+        Parameters
+        ----------
+        fileName : Str
+            A day file about to be appended to.
+
+        Returns
+        -------
+        CSV File
+            Truncates the file after its last newline, removing a row that a
+            crash left half written.
+
+        """
+        with open(fileName, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail.endswith(b'\n'):
+                return
+            cut = tail.rfind(b'\n')
+            f.truncate(size - len(tail) + cut + 1 if cut >= 0 else max(0, size - len(tail)))
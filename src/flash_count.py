@@ -0,0 +1,916 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flash Count File
+
+Purpose: This module holds the counting engine used by the Driver class. Each
+GLM netCDF is opened once, the flash_lat and flash_lon arrays are read a single
+time and the flashes that fall inside the box around the interpolated storm
+location are counted with one masked numpy comparison. Files are read through
+the GLMReader of class_glm as float32 arrays. When several boxes are
+asked of the same file, a FlashIndex sorted by latitude answers each box with
+a binary search instead of a scan over every flash.
+
+If a FlashCache is passed, the decoded flash arrays are taken from the cache
+and the netCDF is not opened at all. If a BoundsIndex is passed, a file whose
+flashes were all far from the storm the last time it was read is skipped
+before anything is opened.
+
+Three geometries can be counted, all vectorized over the flash arrays:
+    degree - the original box, size degrees up, down, left and right.
+    km - a true box reaching size km north, south, east and west.
+    radius - a great-circle circle of size km, measured with haversine.
+A list of radii can be counted on top of any geometry from the same distances.
+
+Flashes can also be binned by storm-relative distance rings and by quadrant
+relative to the storm heading with one np.histogram2d call per center.
+
+In the per-flash mode the time of every flash is read from
+flash_time_offset_of_first_event and the file's time_coverage_start, the storm
+is located at each flash's own time, and every flash is tested against its own
+center in the same array pass.
+
+Functions:
+    readFlashLatLons()
+    readFlashes()
+    loadFlashLatLons()
+    readFlashLatLonTimes()
+    flashTimes()
+    loadFlashLatLonTimes()
+    countFlashesInBox()
+    haversineKm()
+    countFlashesInKmBox()
+    countFlashesInRadius()
+    countFlashesInRadii()
+    countFlashes()
+    bearingDegrees()
+    binFlashes()
+    measureFlashes()
+    bandHalfWidth()
+    boundsMayReach()
+    countFlashesForScan()
+    countFlashesForFile()
+    initWorker()
+    countFlashesInWorker()
+
+Classes:
+    FlashIndex
+        __init__()
+        band()
+        countInBox()
+
+For a list of function descriptions:
+    help(flash_count)
+
+@author: coreywalker
+"""
+
+import numpy as np
+from class_glm import GLMReader
+
+#the reader every file of this process is opened with, it keeps the open, read and count timings
+reader = GLMReader()
+
+#the count settings of a pool worker, set once by initWorker() so the cache and bounds index are not sent with every file
+workerSettings = {}
+
+#the flash variables kept for each GLM file by a FlashCache
+flashVariables = ['flash_lat', 'flash_lon', 'flash_time_offset_of_first_event', 'flash_energy', 'flash_area']
+
+#mean radius of the earth and the length of one degree of latitude in km
+earthRadiusKm = 6371.0088
+kmPerDegree = earthRadiusKm * np.pi / 180
+
+#the geometries understood by countFlashes()
+geometries = ['degree', 'km', 'radius']
+
+#quadrants relative to the storm heading, clockwise from straight ahead
+quadrants = ['Front-Right', 'Rear-Right', 'Rear-Left', 'Front-Left']
+quadrantEdges = [0, 90, 180, 270, 360]
+
+
+def readFlashLatLons(fileName, memory=None):
+    """
+
+
+    Parameters
+    ----------
+    fileName : Str
+        Path to a GLM L2 LCFA netCDF file.
+    memory : Bytes
+        The content of the file. If given the file is opened from memory and
+        fileName is only used as a label. Default is None.
+
+    Returns
+    -------
+    Tuple of numpy arrays
+        The float32 (flash_lat, flash_lon) arrays of the file. Masked values
+        are returned as nan so they never fall inside a box.
+
+    """
+    flashes = reader.read(fileName, ['flash_lat', 'flash_lon'], memory)
+
+    return flashes['flash_lat'], flashes['flash_lon']
+
+
+def readFlashes(fileName, memory=None):
+    """
+
+
+    Parameters
+    ----------
+    fileName : Str
+        Path to a GLM L2 LCFA netCDF file.
+    memory : Bytes
+        The content of the file. If given the file is opened from memory and
+        fileName is only used as a label. Default is None.
+
+    Returns
+    -------
+    Dictionary
+        The arrays of every variable in flashVariables keyed by name, with
+        masked values returned as nan, and the time_coverage_start of the file
+        in nanoseconds since 1970.
+
+    """
+    return reader.read(fileName, flashVariables, memory, coverageStart=True)
+
+
+def loadFlashLatLons(fileName, memory=None, cache=None):
+    """
+
+
+    Parameters
+    ----------
+    fileName : Str
+        Path to a GLM L2 LCFA netCDF file.
+    memory : Bytes
+        The content of the file. Default is None.
+    cache : FlashCache
+        A cache of decoded flash arrays. On a hit the netCDF is not opened, on
+        a miss every variable in flashVariables is decoded and cached.
+        Default is None, which reads only flash_lat and flash_lon.
+
+    Returns
+    -------
+    Tuple of numpy arrays
+        The (flash_lat, flash_lon) arrays of the file.
+
+    """
+    if cache is None:
+        return readFlashLatLons(fileName, memory)
+
+    flashes = cache.get(fileName)
+    if flashes is None:
+        flashes = readFlashes(fileName, memory)
+        cache.put(fileName, flashes)
+
+    return flashes['flash_lat'], flashes['flash_lon']
+
+
+def readFlashLatLonTimes(fileName, memory=None):
+    """
+
+
+    Parameters
+    ----------
+    fileName : Str
+        Path to a GLM L2 LCFA netCDF file.
+    memory : Bytes
+        The content of the file. Default is None.
+
+    Returns
+    -------
+    Tuple of numpy arrays
+        The (flash_lat, flash_lon, flashTimes) arrays of the file, where
+        flashTimes is the time of the first event of every flash in nanoseconds
+        since 1970.
+
+    """
+    flashes = reader.read(fileName, ['flash_lat', 'flash_lon', 'flash_time_offset_of_first_event'], memory, coverageStart=True)
+    times = flashTimes(int(flashes['time_coverage_start']), flashes['flash_time_offset_of_first_event'])
+
+    return flashes['flash_lat'], flashes['flash_lon'], times
+
+
+def flashTimes(start, offsets):
+    """
+
+
+    Parameters
+    ----------
+    start : Int
+        The time_coverage_start of the file in nanoseconds since 1970.
+    offsets : numpy array
+        The flash_time_offset_of_first_event of every flash in seconds.
+
+    Returns
+    -------
+    numpy array
+        The time of every flash in nanoseconds since 1970. Missing offsets are
+        placed at the start of the file.
+
+    """
+    offsets = np.nan_to_num(np.asarray(offsets, dtype=float))
+
+    return start + np.round(offsets * 1e9).astype('int64')
+
+
+def loadFlashLatLonTimes(fileName, memory=None, cache=None):
+    """
+
+
+    Parameters
+    ----------
+    fileName : Str
+        Path to a GLM L2 LCFA netCDF file.
+    memory : Bytes
+        The content of the file. Default is None.
+    cache : FlashCache
+        A cache of decoded flash arrays checked before the file is opened.
+        Default is None.
+
+    Returns
+    -------
+    Tuple of numpy arrays
+        The (flash_lat, flash_lon, flashTimes) arrays of the file.
+
+    """
+    if cache is None:
+        return readFlashLatLonTimes(fileName, memory)
+
+    flashes = cache.get(fileName)
+    #entries written before the coverage start was cached are decoded again
+    if flashes is None or 'time_coverage_start' not in flashes:
+        flashes = readFlashes(fileName, memory)
+        cache.put(fileName, flashes)
+
+    times = flashTimes(int(flashes['time_coverage_start']), flashes['flash_time_offset_of_first_event'])
+
+    return flashes['flash_lat'], flashes['flash_lon'], times
+
+
+def countFlashesInBox(flashLats, flashLons, lat, lon, boxSize=1):
+    """
+
+
+    Parameters
+    ----------
+    flashLats : numpy array
+        Latitudes of every flash in the file.
+    flashLons : numpy array
+        Longitudes of every flash in the file.
+    lat : Float
+        Latitude of the center of the box.
+    lon : Float
+        Longitude of the center of the box.
+    boxSize : Float
+        The number of degrees up, down, left and right of the center that
+        counts as inside the box. Default is 1.
+
+    Returns
+    -------
+    Int
+        The number of flashes inside the box, edges included.
+
+    """
+    flashLats = np.asarray(flashLats)
+    flashLons = np.asarray(flashLons)
+
+    inBox = ((flashLats >= lat - boxSize) & (flashLats <= lat + boxSize) &
+             (flashLons >= lon - boxSize) & (flashLons <= lon + boxSize))
+
+    return int(np.count_nonzero(inBox))
+
+
+def haversineKm(lat, lon, flashLats, flashLons):
+    """
+
+
+    Parameters
+    ----------
+    lat : Float
+        Latitude of the center.
+    lon : Float
+        Longitude of the center.
+    flashLats : numpy array
+        Latitudes of the flashes.
+    flashLons : numpy array
+        Longitudes of the flashes.
+
+    Returns
+    -------
+    numpy array
+        The great-circle distance in km from the center to every flash.
+
+    """
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(flashLats))
+    dLat = lat2 - lat1
+    dLon = np.radians(np.asarray(flashLons) - lon)
+
+    a = np.sin(dLat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dLon / 2) ** 2
+
+    return 2 * earthRadiusKm * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def countFlashesInKmBox(flashLats, flashLons, lat, lon, halfWidthKm):
+    """
+
+
+    Parameters
+    ----------
+    flashLats : numpy array
+        Latitudes of every flash in the file.
+    flashLons : numpy array
+        Longitudes of every flash in the file.
+    lat : Float
+        Latitude of the center of the box.
+    lon : Float
+        Longitude of the center of the box.
+    halfWidthKm : Float
+        The number of km north, south, east and west of the center that counts
+        as inside the box.
+
+    Returns
+    -------
+    Int
+        The number of flashes inside the box. East-west distances are measured
+        along the parallel of each flash, so the box keeps its width in km as
+        the latitude rises.
+
+    """
+    flashLats = np.asarray(flashLats)
+    flashLons = np.asarray(flashLons)
+
+    #wrap the longitude difference into -180 to 180 so the box can cross the dateline
+    dLon = (flashLons - lon + 180) % 360 - 180
+    northKm = (flashLats - lat) * kmPerDegree
+    eastKm = dLon * kmPerDegree * np.cos(np.radians(flashLats))
+
+    inBox = (np.abs(northKm) <= halfWidthKm) & (np.abs(eastKm) <= halfWidthKm)
+
+    return int(np.count_nonzero(inBox))
+
+
+def countFlashesInRadius(flashLats, flashLons, lat, lon, radiusKm):
+    """
+
+
+    Parameters
+    ----------
+    flashLats : numpy array
+        Latitudes of every flash in the file.
+    flashLons : numpy array
+        Longitudes of every flash in the file.
+    lat : Float
+        Latitude of the center.
+    lon : Float
+        Longitude of the center.
+    radiusKm : Float
+        The great-circle radius around the center in km.
+
+    Returns
+    -------
+    Int
+        The number of flashes within radiusKm of the center.
+
+    """
+    return int(np.count_nonzero(haversineKm(lat, lon, flashLats, flashLons) <= radiusKm))
+
+
+def countFlashesInRadii(flashLats, flashLons, lat, lon, radii):
+    """
+
+
+    Parameters
+    ----------
+    flashLats : numpy array
+        Latitudes of every flash in the file.
+    flashLons : numpy array
+        Longitudes of every flash in the file.
+    lat : Float
+        Latitude of the center.
+    lon : Float
+        Longitude of the center.
+    radii : List
+        Great-circle radii in km, ex:
+            [50, 100, 200, 400]
+
+    Returns
+    -------
+    List
+        The number of flashes within each radius. The distances are computed
+        once and sorted, so every radius costs one binary search.
+
+    """
+    distances = np.sort(haversineKm(lat, lon, flashLats, flashLons))
+
+    return [int(n) for n in np.searchsorted(distances, radii, side='right')]
+
+
+def countFlashes(flashLats, flashLons, lat, lon, geometry='degree', size=1):
+    """
+
+
+    Parameters
+    ----------
+    flashLats : numpy array
+        Latitudes of every flash in the file.
+    flashLons : numpy array
+        Longitudes of every flash in the file.
+    lat : Float
+        Latitude of the center.
+    lon : Float
+        Longitude of the center.
+    geometry : Str
+        One of 'degree', 'km' or 'radius'. Default is 'degree'.
+    size : Float
+        Degrees from the center for 'degree', km from the center for 'km'
+        and 'radius'. Default is 1.
+
+    Returns
+    -------
+    Int
+        The number of flashes inside the geometry.
+
+    """
+    if geometry == 'degree':
+        return countFlashesInBox(flashLats, flashLons, lat, lon, size)
+    if geometry == 'km':
+        return countFlashesInKmBox(flashLats, flashLons, lat, lon, size)
+    if geometry == 'radius':
+        return countFlashesInRadius(flashLats, flashLons, lat, lon, size)
+
+    raise ValueError('Unknown geometry {}, use one of {}'.format(geometry, geometries))
+
+
+def bearingDegrees(lat1, lon1, lat2, lon2):
+    """
+
+
+    Parameters
+    ----------
+    lat1 : Float or numpy array
+        Latitude of the start point.
+    lon1 : Float or numpy array
+        Longitude of the start point.
+    lat2 : Float or numpy array
+        Latitude of the end point.
+    lon2 : Float or numpy array
+        Longitude of the end point.
+
+    Returns
+    -------
+    Float or numpy array
+        The initial great-circle bearing from the start to the end point in
+        degrees clockwise from north, between 0 and 360.
+
+    """
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    dLon = np.radians(np.asarray(lon2) - lon1)
+
+    x = np.sin(dLon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dLon)
+
+    return np.degrees(np.arctan2(x, y)) % 360
+
+
+def binFlashes(flashLats, flashLons, lat, lon, heading, rings):
+    """
+
+
+    Parameters
+    ----------
+    flashLats : numpy array
+        Latitudes of the flashes.
+    flashLons : numpy array
+        Longitudes of the flashes.
+    lat : Float or numpy array
+        Latitude of the storm center, or of one center per flash.
+    lon : Float or numpy array
+        Longitude of the storm center, or of one center per flash.
+    heading : Float
+        Direction the storm is moving in degrees clockwise from north.
+    rings : List
+        Edges of the distance rings in km, ex:
+            [0, 50, 100, 200, 400]
+
+    Returns
+    -------
+    Dictionary
+        One 'Flashes <inner>-<outer>km <quadrant>' entry for every ring and
+        quadrant, counted with a single np.histogram2d over distance and
+        bearing relative to the heading. Flashes beyond the last ring are left
+        out.
+
+    """
+    flashLats = np.asarray(flashLats)
+    flashLons = np.asarray(flashLons)
+    #a center per flash is filtered along with the flashes
+    lat = np.broadcast_to(lat, flashLats.shape)
+    lon = np.broadcast_to(lon, flashLats.shape)
+    valid = np.isfinite(flashLats) & np.isfinite(flashLons) & np.isfinite(lat) & np.isfinite(lon)
+    flashLats = flashLats[valid]
+    flashLons = flashLons[valid]
+    lat = lat[valid]
+    lon = lon[valid]
+
+    distances = haversineKm(lat, lon, flashLats, flashLons)
+    relativeBearings = (bearingDegrees(lat, lon, flashLats, flashLons) - heading) % 360
+
+    counts, ringEdges, bearingEdges = np.histogram2d(distances, relativeBearings, bins=[rings, quadrantEdges])
+
+    bins = {}
+    for i in range(len(rings) - 1):
+        for j, quadrant in enumerate(quadrants):
+            bins['Flashes {}-{}km {}'.format(rings[i], rings[i + 1], quadrant)] = int(counts[i, j])
+
+    return bins
+
+
+def measureFlashes(flashLats, flashLons, lat, lon, geometry='degree', size=1, radii=None, heading=None, rings=None):
+    """
+
+
+    Parameters
+    ----------
+    flashLats : numpy array
+        Latitudes of the flashes.
+    flashLons : numpy array
+        Longitudes of the flashes.
+    lat : Float or numpy array
+        Latitude of the center, or of one center per flash.
+    lon : Float or numpy array
+        Longitude of the center, or of one center per flash.
+    geometry : Str
+        One of 'degree', 'km' or 'radius'. Default is 'degree'.
+    size : Float
+        The size of the geometry. Default is 1.
+    radii : List
+        Great-circle radii in km to count as well. Default is None.
+    heading : Float
+        Direction the storm is moving in degrees clockwise from north, used by
+        rings. Default is None.
+    rings : List
+        Edges of storm-relative distance rings in km to bin the flashes into
+        by quadrant. Default is None.
+
+    Returns
+    -------
+    Tuple
+        The (flashCount, extraColumns) of the center, where extraColumns is a
+        dictionary with one 'Flash Count <radius>km' entry per radius and one
+        entry per ring and quadrant, or empty when radii and rings are None.
+
+    """
+    flashCount = countFlashes(flashLats, flashLons, lat, lon, geometry, size)
+
+    extraColumns = {}
+    if radii is not None:
+        for radius, n in zip(radii, countFlashesInRadii(flashLats, flashLons, lat, lon, radii)):
+            extraColumns['Flash Count {}km'.format(radius)] = n
+    if rings is not None:
+        extraColumns.update(binFlashes(flashLats, flashLons, lat, lon, heading, rings))
+
+    return flashCount, extraColumns
+
+
+def bandHalfWidth(geometry='degree', size=1, radii=None, rings=None):
+    """
+
+
+    Parameters
+    ----------
+    geometry : Str
+        One of 'degree', 'km' or 'radius'. Default is 'degree'.
+    size : Float
+        The size of the geometry. Default is 1.
+    radii : List
+        Great-circle radii in km to count as well. Default is None.
+    rings : List
+        Edges of storm-relative distance rings in km. Default is None.
+
+    Returns
+    -------
+    Float
+        The number of degrees of latitude above and below the center that hold
+        every flash the geometry, radii and rings can count.
+
+    """
+    if geometry == 'degree':
+        halfWidth = size
+    else:
+        halfWidth = size / kmPerDegree
+    if radii is not None:
+        halfWidth = max(halfWidth, max(radii) / kmPerDegree)
+    if rings is not None:
+        halfWidth = max(halfWidth, max(rings) / kmPerDegree)
+
+    return halfWidth
+
+
+def boundsMayReach(bounds, lat, lon, geometry='degree', size=1, radii=None, rings=None, margin=0):
+    """
+
+
+    Parameters
+    ----------
+    bounds : Tuple
+        The (nFlashes, minLat, maxLat, minLon, maxLon) of a file, as kept by
+        a BoundsIndex.
+    lat : Float
+        Latitude of the center.
+    lon : Float
+        Longitude of the center.
+    geometry : Str
+        One of 'degree', 'km' or 'radius'. Default is 'degree'.
+    size : Float
+        The size of the geometry. Default is 1.
+    radii : List
+        Great-circle radii in km to count as well. Default is None.
+    rings : List
+        Edges of storm-relative distance rings in km. Default is None.
+    margin : Float
+        Extra degrees added around the center, ex: for a storm that moves
+        during the file. Default is 0.
+
+    Returns
+    -------
+    Bool
+        False when no flash of the file can be counted around the center, so
+        the file does not need to be read. The test is conservative, True only
+        means the flashes might reach the center.
+
+    """
+    nFlashes, minLat, maxLat, minLon, maxLon = bounds
+    if nFlashes == 0:
+        return False
+
+    halfWidth = bandHalfWidth(geometry, size, radii, rings) + margin
+    if lat + halfWidth < minLat or lat - halfWidth > maxLat:
+        return False
+
+    #a degree of longitude is shortest at the edge of the box nearest a pole
+    edgeLat = abs(lat) + halfWidth
+    if edgeLat >= 89:
+        return True
+    lonScale = 1 / np.cos(np.radians(edgeLat))
+
+    kmHalfWidth = max([0] + ([size] if geometry != 'degree' else []) + list(radii or []) + list(rings or []))
+    lonHalfWidth = max(size if geometry == 'degree' else 0, kmHalfWidth / kmPerDegree * lonScale) + margin * lonScale
+
+    #the distance from the center to the longitudes of the flashes, across the antimeridian too
+    if minLon <= lon <= maxLon:
+        gap = 0
+    else:
+        gap = min((minLon - lon) % 360, (lon - maxLon) % 360)
+
+    return gap <= lonHalfWidth
+
+
+def countFlashesForScan(scan, memory=None, cache=None, geometry='degree', size=1, radii=None, rings=None, locate=None, index=None):
+    """
+
+
+    Parameters
+    ----------
+    scan : Tuple
+        A (fileName, time, lat, lon, heading) tuple taken from one row of the
+        merged dataframe. A single tuple is used so the function can be handed to
+        a process pool directly.
+    memory : Bytes
+        The content of the file, to open it without reading from disk.
+        Default is None.
+    cache : FlashCache
+        A cache of decoded flash arrays checked before the file is opened.
+        Default is None.
+    geometry : Str
+        One of 'degree', 'km' or 'radius'. Default is 'degree'.
+    size : Float
+        The size of the geometry. Default is 1.
+    radii : List
+        Great-circle radii in km to count as well. Default is None.
+    rings : List
+        Edges of storm-relative distance rings in km. Default is None.
+    locate : Function
+        Turns an array of flash times in nanoseconds into the (lats, lons) of
+        the storm at those times, ex:
+            partial(interpolatePositions, fixTimes=..., fixLats=..., fixLons=...)
+        When given every flash is tested against the storm center at its own
+        time. Default is None, which uses one center per scan.
+    index : BoundsIndex
+        The flash bounds of files read before. A file whose flashes cannot
+        reach the center is not read at all. Default is None.
+
+    Returns
+    -------
+    Tuple
+        The (time, lat, lon, flashCount, extraColumns) result for the scan.
+
+    """
+    fileName, time, lat, lon, heading = scan
+
+    return countFlashesForFile((fileName, [(time, lat, lon, heading)]), memory, cache, geometry, size, radii, rings, locate, index)[0]
+
+
+def countFlashesForFile(task, memory=None, cache=None, geometry='degree', size=1, radii=None, rings=None, locate=None, index=None):
+    """
+
+
+    Parameters
+    ----------
+    task : Tuple
+        A (fileName, scans) tuple where scans is a list of (time, lat, lon,
+        heading) tuples for every box asked of the file.
+    memory : Bytes
+        The content of the file, to open it without reading from disk.
+        Default is None.
+    cache : FlashCache
+        A cache of decoded flash arrays checked before the file is opened.
+        Default is None.
+    geometry : Str
+        One of 'degree', 'km' or 'radius'. Default is 'degree'.
+    size : Float
+        The size of the geometry. Default is 1.
+    radii : List
+        Great-circle radii in km to count as well. Default is None.
+    rings : List
+        Edges of storm-relative distance rings in km. Default is None.
+    locate : Function
+        Turns an array of flash times in nanoseconds into the (lats, lons) of
+        the storm at those times. When given every flash is tested against
+        the storm center at its own time. Default is None.
+    index : BoundsIndex
+        The flash bounds of files read before. A file whose flashes cannot
+        reach any of the centers is not read, and the bounds of a file read
+        for the first time are added. Default is None.
+
+    Returns
+    -------
+    List
+        A (time, lat, lon, flashCount, extraColumns) tuple for each of the
+        scans. The file is read once, and when more than one box is asked a
+        FlashIndex is built so each box only looks at its latitude band.
+
+    """
+    fileName, scans = task
+
+    if index is not None:
+        bounds = index.get(fileName)
+        #the storm moves well under half a degree during a 20 second file
+        margin = 0.5 if locate is not None else 0
+        if bounds is not None and not any(boundsMayReach(bounds, lat, lon, geometry, size, radii, rings, margin) for time, lat, lon, heading in scans):
+            reader.nSkipped += 1
+            noFlashes = np.empty(0, dtype=np.float32)
+            return [(time, lat, lon) + measureFlashes(noFlashes, noFlashes, lat, lon, geometry, size, radii, heading, rings)
+                    for time, lat, lon, heading in scans]
+
+    if locate is not None:
+        #one storm center per flash, still a single array pass per scan
+        flashLats, flashLons, times = loadFlashLatLonTimes(fileName, memory, cache)
+        if index is not None and index.get(fileName) is None:
+            index.put(fileName, flashLats, flashLons)
+        with reader.timing('count'):
+            centerLats, centerLons = locate(times)
+            return [(time, lat, lon) + measureFlashes(flashLats, flashLons, centerLats, centerLons, geometry, size, radii, heading, rings)
+                    for time, lat, lon, heading in scans]
+
+    flashLats, flashLons = loadFlashLatLons(fileName, memory, cache)
+    if index is not None and index.get(fileName) is None:
+        index.put(fileName, flashLats, flashLons)
+
+    with reader.timing('count'):
+        if len(scans) == 1:
+            time, lat, lon, heading = scans[0]
+            return [(time, lat, lon) + measureFlashes(flashLats, flashLons, lat, lon, geometry, size, radii, heading, rings)]
+
+        index = FlashIndex(flashLats, flashLons)
+        halfWidth = bandHalfWidth(geometry, size, radii, rings)
+
+        results = []
+        for time, lat, lon, heading in scans:
+            bandLats, bandLons = index.band(lat, halfWidth)
+            results.append((time, lat, lon) + measureFlashes(bandLats, bandLons, lat, lon, geometry, size, radii, heading, rings))
+
+        return results
+
+
+def initWorker(settings):
+    """
+
+
+    Parameters
+    ----------
+    settings : Dictionary
+        The cache, geometry, size, radii, rings, locate and index keyword
+        arguments of countFlashesForFile().
+
+    Returns
+    -------
+    Dictionary
+        Keeps the settings for countFlashesInWorker(). Passed as the
+        initializer of a ProcessPoolExecutor, so the settings are sent to each
+        worker once instead of with every file.
+
+    """
+    workerSettings.clear()
+    workerSettings.update(settings)
+
+
+def countFlashesInWorker(task, memory=None):
+    """
+
+
+    Parameters
+    ----------
+    task : Tuple
+        A (fileName, scans) tuple as taken by countFlashesForFile().
+    memory : Bytes
+        The content of the file, to open it without reading from disk.
+        Default is None.
+
+    Returns
+    -------
+    List
+        The results of countFlashesForFile() for the task, counted with the
+        settings given to initWorker() in this process.
+
+    """
+    return countFlashesForFile(task, memory, **workerSettings)
+
+
+class FlashIndex():
+
+    def __init__(self, flashLats, flashLons):
+        """
+        constructor that sorts the flashes of one file by latitude.
+
+        Parameters
+        ----------
+        flashLats : numpy array
+            Latitudes of every flash in the file.
+        flashLons : numpy array
+            Longitudes of every flash in the file.
+
+        Returns
+        -------
+        Self.
+
+        """
+        flashLats = np.asarray(flashLats)
+        flashLons = np.asarray(flashLons)
+
+        #nan latitudes sort to the end and are never inside a box
+        order = np.argsort(flashLats, kind='stable')
+        self.lats = flashLats[order] #flash latitudes in increasing order
+        self.lons = flashLons[order] #flash longitudes in the same order as self.lats
+
+    def band(self, lat, halfWidth):
+        """
+
+
+        Parameters
+        ----------
+        lat : Float
+            Latitude of the center of the band.
+        halfWidth : Float
+            The number of degrees above and below lat included in the band.
+
+        Returns
+        -------
+        Tuple of numpy arrays
+            The (lats, lons) of the flashes inside the latitude band, found
+            with two binary searches.
+
+        """
+        start = np.searchsorted(self.lats, lat - halfWidth, side='left')
+        stop = np.searchsorted(self.lats, lat + halfWidth, side='right')
+
+        return self.lats[start:stop], self.lons[start:stop]
+
+    def countInBox(self, lat, lon, boxSize=1):
+        """
+
+
+        Parameters
+        ----------
+        lat : Float
+            Latitude of the center of the box.
+        lon : Float
+            Longitude of the center of the box.
+        boxSize : Float
+            The number of degrees around the center that counts as inside the
+            box. Default is 1.
+
+        Returns
+        -------
+        Int
+            The number of flashes inside the box, edges included. Only the k
+            flashes in the latitude band have their longitude checked.
+
+        """
+        bandLats, bandLons = self.band(lat, boxSize)
+
+        return int(np.count_nonzero((bandLons >= lon - boxSize) & (bandLons <= lon + boxSize)))
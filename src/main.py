@@ -59,7 +59,14 @@ obj.createDownloadStartStopString()
 #create the list of buckets that AWS CLI will use to download files
 obj.createDownloadList()
 
+#list the buckets and keep only the files scanned between the first and last fix of the storm
+obj.planDownloads()
+
 #download the data from AWS
+#obj.streamNetCDFs() can replace the download, file info, merge and processing steps below 
+#to count each file as soon as it arrives and delete it right away
+#asyncio.run(obj.runAsync()) replaces every step from listing to processing, overlapping 
+#the listing, downloads and counting
 obj.getGLMData() #comment this out if you alredy have the data
 
 #create the file info dataframe to categorize downloaded data
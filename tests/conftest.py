@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Configuration File
+
+Purpose: The modules of this project are imported flat from src/, the way
+main.py imports them, so src/ is put on the path before the tests run.
+
+The fixtures below give every test a bucket of synthetic GLM files read
+through a LocalBucket, an empty data directory in place of ./data/ and a
+Driver set up along the hurricane Ana line of main.py, so each counting path
+can be run over the same files with no network.
+
+@author: coreywalker
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import matplotlib
+matplotlib.use('Agg')
+import pytest
+
+import class_driver
+from class_driver import Driver
+from class_bucket import LocalBucket
+from class_instrument import Instrument
+from class_synthetic import SyntheticGLM
+
+#the hurricane Ana line of main.py
+stormStart = datetime(2021, 5, 20)
+stormPoints = (30.30, -55.50, 30.86, -55.11)
+
+
+@pytest.fixture
+def bucketDir(tmp_path):
+    """
+    A bucket of 90 synthetic GLM files, the first half hour of the storm, with
+    the flashes clustered on the track.
+    """
+    bucketDir = str(tmp_path / 'bucket')
+    synthetic = SyntheticGLM(bucketDir)
+    synthetic.makeFiles(stormStart, 90, 200, clusters=[(30.58, -55.30)], spread=1.0)
+
+    return bucketDir
+
+
+@pytest.fixture
+def dataDir(tmp_path):
+    """
+    An empty data directory the downloads go to, in place of ./data/
+    """
+    dataDir = str(tmp_path / 'data') + '/'
+    os.makedirs(dataDir)
+
+    return dataDir
+
+
+@pytest.fixture
+def makeDriver(bucketDir, dataDir):
+    """
+    Makes a Driver interpolated along the storm line of main.py, reading from
+    the synthetic bucket and downloading to the data directory, with the
+    progress bar turned off.
+    """
+    def makeDriver(points=stormPoints):
+        obj = Driver()
+        obj.bucket = LocalBucket(bucketDir)
+        obj.filepath = dataDir
+        obj.instrument = Instrument(progressBar=False)
+        obj.calculateDistance(*points)
+        obj.calculateSpeedPerHour(3)
+        obj.calculate20SecondDistance()
+        obj.getNpointsForInterpolation()
+        obj.interpolateLatLons()
+        obj.createInterpolatedTimeStamps(stormStart.year, stormStart.month, stormStart.day, 0, 0, 0)
+        obj.createDownloadStartStopString()
+        obj.createDownloadList()
+
+        return obj
+
+    return makeDriver
+
+
+@pytest.fixture
+def processFiles():
+    """
+    Runs the download-then-count steps of main.py on a Driver and returns its
+    processedDataFrame.
+    """
+    def processFiles(obj, **kwargs):
+        obj.planDownloads()
+        obj.getGLMData()
+        obj.createFilesInfoDataFrame()
+        obj.merge()
+        obj.processNetCDFs(**kwargs)
+        obj.makeFlashDataFrame()
+        obj.removeData()
+
+        return obj.processedDataFrame
+
+    return processFiles
+
+
+
+@pytest.fixture
+def countCalls(monkeypatch):
+    """
+    Records the files countFlashesForFile is called for by the Driver in
+    countCalls.counted, and stops the run with a RuntimeError once
+    countCalls.crashAfter files are counted.
+    """
+    counted = []
+    countFlashesForFile = class_driver.countFlashesForFile
+
+    def countCalls(task, *args, **kwargs):
+        if countCalls.crashAfter is not None and len(counted) == countCalls.crashAfter:
+            raise RuntimeError('Stopped after {} files'.format(len(counted)))
+        counted.append(os.path.basename(task[0]))
+        return countFlashesForFile(task, *args, **kwargs)
+
+    countCalls.crashAfter = None
+    countCalls.counted = counted
+    monkeypatch.setattr(class_driver, 'countFlashesForFile', countCalls)
+
+    return countCalls
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bucket Test File
+
+Purpose: S3Bucket is run against a small S3 stand-in served by http.server on
+localhost through its endpoint argument, so the listing pages, the retries
+and the skipped downloads are checked with no network.
+
+@author: coreywalker
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from xml.sax.saxutils import escape
+
+import pytest
+
+from class_bucket import Bucket, S3Bucket
+
+bucketName = 'noaa-goes16'
+prefix = 'GLM-L2-LCFA/2021/140/00/'
+
+
+class StubS3(BaseHTTPRequestHandler):
+    """
+    Answers ListObjectsV2 with pageSize keys per page and GET of an object,
+    failing a request with the next status in failures[path] first.
+    """
+    protocol_version = 'HTTP/1.1'
+    objects = {}
+    failures = {}
+    requests = []
+    pageSize = 2
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.requests.append(self.path)
+
+        if self.failures.get(url.path):
+            self.reply(self.failures[url.path].pop(0), b'')
+            return
+
+        if url.path == '/' + bucketName + '/':
+            query = parse_qs(url.query)
+            keys = sorted(key for key in self.objects if key.startswith(query['prefix'][0]))
+            start = int(query.get('continuation-token', ['0'])[0])
+            page = keys[start:start + self.pageSize]
+            truncated = start + self.pageSize < len(keys)
+            body = '<?xml version="1.0" encoding="UTF-8"?>'
+            body += '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            body += '<Name>{}</Name><KeyCount>{}</KeyCount>'.format(bucketName, len(page))
+            body += ''.join('<Contents><Key>{}</Key><Size>{}</Size></Contents>'.format(escape(key), len(self.objects[key])) for key in page)
+            body += '<IsTruncated>{}</IsTruncated>'.format('true' if truncated else 'false')
+            if truncated:
+                body += '<NextContinuationToken>{}</NextContinuationToken>'.format(start + self.pageSize)
+            body += '</ListBucketResult>'
+            self.reply(200, body.encode())
+            return
+
+        key = url.path[len('/' + bucketName + '/'):]
+        if key in self.objects:
+            self.reply(200, self.objects[key])
+        else:
+            self.reply(404, b'<Error><Code>NoSuchKey</Code></Error>')
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    """
+    A running S3 stand-in holding three GLM objects, with its request log
+    and failures cleared.
+    """
+    StubS3.objects = {prefix + 'OR_GLM-L2-LCFA_G16_s2021140000{}000.nc'.format(i): bytes([i]) * (100 + i) for i in range(3)}
+    StubS3.failures = {}
+    StubS3.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubS3)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+
+    yield StubS3, 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_incomplete_bucket_cannot_be_created():
+    class ListOnly(Bucket):
+        def listObjects(self, prefix):
+            return []
+
+    with pytest.raises(TypeError):
+        ListOnly()
+
+
+def test_listing_follows_every_page(stub):
+    handler, endpoint = stub
+    bucket = S3Bucket(bucketName, endpoint=endpoint)
+
+    objects = bucket.listObjects(prefix)
+
+    assert objects == sorted((key, len(data)) for key, data in handler.objects.items())
+    #three keys at two a page
+    assert len(handler.requests) == 2
+    assert 'continuation-token=2' in handler.requests[1]
+
+
+def test_server_error_is_retried(stub):
+    handler, endpoint = stub
+    key = sorted(handler.objects)[0]
+    handler.failures['/{}/{}'.format(bucketName, key)] = [503]
+    bucket = S3Bucket(bucketName, endpoint=endpoint, backoff=0.01)
+
+    assert bucket.getObject(key) == handler.objects[key]
+    assert len(handler.requests) == 2
+
+
+def test_missing_object_is_not_retried(stub):
+    handler, endpoint = stub
+    bucket = S3Bucket(bucketName, endpoint=endpoint, backoff=0.01)
+
+    with pytest.raises(FileNotFoundError):
+        bucket.getObject(prefix + 'missing.nc')
+    assert len(handler.requests) == 1
+
+
+def test_download_of_present_file_is_skipped(stub, tmp_path):
+    handler, endpoint = stub
+    bucket = S3Bucket(bucketName, endpoint=endpoint)
+    objects = bucket.listObjects(prefix)
+    del handler.requests[:]
+
+    assert bucket.downloadObjects(objects, str(tmp_path)) == (3, 0, sum(size for key, size in objects))
+    for key, size in objects:
+        with open(os.path.join(str(tmp_path), os.path.basename(key)), 'rb') as f:
+            assert f.read() == handler.objects[key]
+    assert len(handler.requests) == 3
+
+    #a second run finds every file with the right size and fetches nothing
+    assert bucket.downloadObjects(objects, str(tmp_path)) == (0, 3, 0)
+    assert len(handler.requests) == 3
+
+    #a file cut short is fetched again
+    key, size = objects[0]
+    with open(os.path.join(str(tmp_path), os.path.basename(key)), 'wb') as f:
+        f.write(b'x')
+    assert bucket.downloadObject(key, size, str(tmp_path)) == size
+    assert len(handler.requests) == 4
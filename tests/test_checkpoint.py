@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checkpoint Test File
+
+Purpose: A run with a Checkpoint that stops part way must carry on to the
+same result as a run that never stopped, without downloading or counting the
+files it had counted, and a log written for another storm track or other
+count settings must never be restored.
+
+@author: coreywalker
+"""
+
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from class_bucket import LocalBucket
+from class_checkpoint import Checkpoint
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """
+    Records the names of the files the LocalBucket downloads.
+    """
+    downloaded = []
+    downloadObject = LocalBucket.downloadObject
+
+    def download(self, key, size, destDir):
+        downloaded.append(os.path.basename(key))
+        return downloadObject(self, key, size, destDir)
+
+    monkeypatch.setattr(LocalBucket, 'downloadObject', download)
+
+    return downloaded
+
+
+def test_resume_matches_uninterrupted_run(makeDriver, processFiles, dataDir, tmp_path, countCalls, downloads):
+    expected = processFiles(makeDriver())
+
+    checkpointFile = str(tmp_path / 'checkpoint.jsonl')
+    obj = makeDriver()
+    obj.checkpoint = Checkpoint(checkpointFile)
+    del countCalls.counted[:]
+    countCalls.crashAfter = 30
+    with pytest.raises(RuntimeError, match='Stopped'):
+        processFiles(obj)
+    #the data of the crashed run is gone, ex: a new machine
+    shutil.rmtree(dataDir)
+    os.makedirs(dataDir)
+
+    countCalls.crashAfter = None
+    del countCalls.counted[:]
+    del downloads[:]
+    obj = makeDriver()
+    obj.checkpoint = Checkpoint(checkpointFile)
+    resumed = processFiles(obj)
+
+    pd.testing.assert_frame_equal(resumed, expected)
+    #the 30 files counted before the crash are neither downloaded nor counted again
+    assert len(countCalls.counted) == 60
+    assert sorted(downloads) == sorted(countCalls.counted)
+
+
+@pytest.mark.parametrize('change', ['track', 'radius'])
+def test_other_settings_restore_nothing(makeDriver, processFiles, tmp_path, countCalls, change):
+    def makeChanged():
+        #the same storm moved, or the same track counted in a wider circle
+        obj = makeDriver((30.30, -55.50, 30.90, -55.00)) if change == 'track' else makeDriver()
+        obj.setBoxGeometry('radius', 100 if change == 'track' else 150)
+        return obj
+
+    checkpointFile = str(tmp_path / 'checkpoint.jsonl')
+    obj = makeDriver()
+    obj.setBoxGeometry('radius', 100)
+    obj.checkpoint = Checkpoint(checkpointFile)
+    processFiles(obj)
+    expected = processFiles(makeChanged())
+
+    del countCalls.counted[:]
+    obj = makeChanged()
+    obj.checkpoint = Checkpoint(checkpointFile)
+    again = processFiles(obj)
+
+    #every file is counted again, none of the logged counts are restored
+    assert len(countCalls.counted) == 90
+    pd.testing.assert_frame_equal(again, expected)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Counting Modes Test File
+
+Purpose: Every way of counting a storm must give the same dataframe over the
+same files. These tests run the modes of the Driver over a LocalBucket of
+synthetic GLM files and compare them with the serial processNetCDFs() of
+main.py, and check that a failed stream leaves no files behind.
+
+@author: coreywalker
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from class_bucket import LocalBucket
+
+
+@pytest.mark.parametrize('rings', [None, [0, 50, 100, 200, 400]])
+def test_parallel_matches_serial(makeDriver, processFiles, rings):
+    obj = makeDriver()
+    obj.setStormRelativeBins(rings)
+    expected = processFiles(obj)
+    assert len(expected) == 90 and expected['Flash Count'].sum() > 0
+
+    obj = makeDriver()
+    obj.setStormRelativeBins(rings)
+    parallel = processFiles(obj, parallel=True, workers=2)
+
+    pd.testing.assert_frame_equal(parallel, expected)
+    if rings is not None:
+        assert len(parallel.columns) == 4 + 4 * 4
+
+
+@pytest.mark.parametrize('rings', [[0, 50, 50, 100], [0, 100, 50], [100]])
+def test_rings_must_strictly_increase(makeDriver, rings):
+    obj = makeDriver()
+
+    with pytest.raises(ValueError, match='strictly increase'):
+        obj.setStormRelativeBins(rings)
+
+
+@pytest.mark.parametrize('inMemory', [False, True])
+def test_stream_matches_batch(makeDriver, processFiles, dataDir, inMemory):
+    expected = processFiles(makeDriver())
+
+    obj = makeDriver()
+    obj.planDownloads()
+    obj.streamNetCDFs(workers=4, queueSize=4, inMemory=inMemory)
+    obj.makeFlashDataFrame()
+
+    pd.testing.assert_frame_equal(obj.processedDataFrame, expected)
+    assert os.listdir(dataDir) == []
+
+
+def test_stream_download_failure_leaves_no_files(makeDriver, dataDir, monkeypatch):
+    getObject = LocalBucket.getObject
+
+    def failingGetObject(self, key):
+        if key.endswith(failing):
+            raise OSError('Connection reset fetching {}'.format(key))
+        return getObject(self, key)
+
+    monkeypatch.setattr(LocalBucket, 'getObject', failingGetObject)
+    obj = makeDriver()
+    obj.planDownloads()
+    #a file half way through the run
+    failing = os.path.basename(obj.downloadPlan[len(obj.downloadPlan) // 2][0])
+
+    with pytest.raises(OSError, match='Connection reset'):
+        obj.streamNetCDFs(workers=4, queueSize=4)
+    assert os.listdir(dataDir) == []
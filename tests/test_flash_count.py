@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flash Count Test File
+
+Purpose: Pins the flash counts of the counting engine against a brute-force
+count over a small synthetic netCDF, with flashes on the edges of the box and
+flashes whose latitude or longitude is missing.
+
+@author: coreywalker
+"""
+
+import numpy as np
+import netCDF4 as nc
+import pandas as pd
+import pytest
+
+from flash_count import countFlashesInBox, countFlashesForFile, readFlashLatLons
+
+#the center of the box every test counts around
+centerLat = 30.0
+centerLon = -55.0
+fillValue = -999.0
+
+
+def bruteForceCount(lats, lons, lat, lon, boxSize):
+    """
+
+
+    Parameters
+    ----------
+    lats : List
+        Latitudes of the flashes, None where missing.
+    lons : List
+        Longitudes of the flashes, None where missing.
+    lat : Float
+        Latitude of the center of the box.
+    lon : Float
+        Longitude of the center of the box.
+    boxSize : Float
+        Degrees up, down, left and right of the center.
+
+    Returns
+    -------
+    Int
+        The flashes inside the box, edges included, counted one at a time.
+
+    """
+    count = 0
+    for flashLat, flashLon in zip(lats, lons):
+        if flashLat is None or flashLon is None:
+            continue
+        if lat - boxSize <= flashLat <= lat + boxSize and lon - boxSize <= flashLon <= lon + boxSize:
+            count += 1
+
+    return count
+
+
+@pytest.fixture
+def flashFile(tmp_path):
+    """
+
+
+    Returns
+    -------
+    Tuple
+        The path of a netCDF with flash_lat and flash_lon, and the lats and
+        lons written to it with None for the masked values. Every value is
+        exactly representable as a float32.
+
+    """
+    rng = np.random.default_rng(1)
+    lats = list(np.round(rng.uniform(centerLat - 3, centerLat + 3, 200) * 8) / 8)
+    lons = list(np.round(rng.uniform(centerLon - 3, centerLon + 3, 200) * 8) / 8)
+
+    #on the edges and corners of the 1 degree box, which count
+    lats += [centerLat - 1, centerLat + 1, centerLat, centerLat, centerLat + 1, centerLat - 1]
+    lons += [centerLon, centerLon, centerLon - 1, centerLon + 1, centerLon + 1, centerLon - 1]
+    #just outside the box, which do not
+    lats += [centerLat + 1.0078125, centerLat]
+    lons += [centerLon, centerLon - 1.0078125]
+    #missing latitudes or longitudes, which do not count either
+    lats += [None, centerLat, None]
+    lons += [centerLon, None, None]
+
+    fileName = str(tmp_path / 'OR_GLM-L2-LCFA_G16_s20211400000000_e20211400000200_c20211400000227.nc')
+    with nc.Dataset(fileName, 'w') as ds:
+        ds.createDimension('number_of_flashes', len(lats))
+        for name, values in [('flash_lat', lats), ('flash_lon', lons)]:
+            variable = ds.createVariable(name, 'f4', ('number_of_flashes',), fill_value=fillValue)
+            variable[:] = np.ma.masked_equal([fillValue if value is None else value for value in values], fillValue)
+
+    return fileName, lats, lons
+
+
+def test_missing_values_are_nan(flashFile):
+    fileName, lats, lons = flashFile
+    flashLats, flashLons = readFlashLatLons(fileName)
+
+    assert flashLats.dtype == np.float32
+    assert np.isnan(flashLats).sum() == sum(lat is None for lat in lats)
+    assert np.isnan(flashLons).sum() == sum(lon is None for lon in lons)
+
+
+@pytest.mark.parametrize('boxSize', [0.5, 1, 2])
+def test_count_in_box_matches_brute_force(flashFile, boxSize):
+    fileName, lats, lons = flashFile
+    flashLats, flashLons = readFlashLatLons(fileName)
+
+    assert countFlashesInBox(flashLats, flashLons, centerLat, centerLon, boxSize) == bruteForceCount(lats, lons, centerLat, centerLon, boxSize)
+
+
+def test_edges_are_counted(flashFile):
+    fileName, lats, lons = flashFile
+    flashLats, flashLons = readFlashLatLons(fileName)
+
+    #only the edge flashes are left once the inside of the box is taken away
+    inside = bruteForceCount(lats, lons, centerLat, centerLon, 1 - 1e-9)
+    assert countFlashesInBox(flashLats, flashLons, centerLat, centerLon, 1) - inside >= 6
+
+
+def test_count_for_file_matches_brute_force(flashFile):
+    fileName, lats, lons = flashFile
+    time = pd.Timestamp('2021-05-20 00:00:00')
+    scans = [(time, centerLat, centerLon, np.nan), (time + pd.Timedelta(seconds=20), centerLat + 1.5, centerLon - 0.5, np.nan)]
+
+    results = countFlashesForFile((fileName, scans))
+
+    assert [result[3] for result in results] == [bruteForceCount(lats, lons, lat, lon, 1) for scanTime, lat, lon, heading in scans]
+    assert [(result[0], result[1], result[2]) for result in results] == [(scanTime, lat, lon) for scanTime, lat, lon, heading in scans]
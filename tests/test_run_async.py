@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run Async Test File
+
+Purpose: runAsync lists, downloads and counts at the same time, so its results
+arrive out of order. These tests run it over a LocalBucket of synthetic GLM
+files and check it gives the same dataframe, scan for scan, as the
+download-then-count steps of main.py over the same bucket, and that a file
+that cannot be counted stops the run without leaving files behind.
+
+@author: coreywalker
+"""
+
+import os
+import glob
+import asyncio
+
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize('inMemory', [False, True])
+def test_run_async_matches_process(makeDriver, processFiles, dataDir, inMemory):
+    expected = processFiles(makeDriver())
+    assert len(expected) == 90 and expected['Flash Count'].sum() > 0
+
+    obj = makeDriver()
+    asyncio.run(obj.runAsync(downloadWorkers=4, countWorkers=2, queueSize=4, inMemory=inMemory))
+    obj.makeFlashDataFrame()
+
+    pd.testing.assert_frame_equal(obj.processedDataFrame, expected)
+    #every file fetched to disk was removed once it was counted
+    assert glob.glob(os.path.join(dataDir, '*.nc')) == []
+
+
+def test_run_async_failure_leaves_no_files(makeDriver, bucketDir, dataDir):
+    #a corrupt object in the middle of the run
+    fileNames = sorted(glob.glob(os.path.join(bucketDir, '**', '*.nc'), recursive=True))
+    with open(fileNames[len(fileNames) // 2], 'wb') as f:
+        f.write(b'not a netCDF' * 1000)
+
+    obj = makeDriver()
+    with pytest.raises(OSError):
+        asyncio.run(obj.runAsync(downloadWorkers=8, countWorkers=2, queueSize=8))
+
+    assert os.listdir(dataDir) == []
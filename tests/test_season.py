@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Season Test File
+
+Purpose: A Season counts several storm tracks at once, so the settings keyed
+to a single track are refused before anything is listed or downloaded.
+
+@author: coreywalker
+"""
+
+import pytest
+
+from class_season import Season
+from class_writer import ResultWriter
+from class_checkpoint import Checkpoint
+
+
+def test_season_refuses_checkpoint(tmp_path):
+    season = Season()
+    season.checkpoint = Checkpoint(str(tmp_path / 'checkpoint.jsonl'))
+
+    with pytest.raises(ValueError, match='checkpoint or writer'):
+        season.getGLMData()
+
+
+def test_season_refuses_writer(tmp_path):
+    season = Season()
+    season.writer = ResultWriter(str(tmp_path / 'results'))
+
+    with pytest.raises(ValueError, match='checkpoint or writer'):
+        season.processSeason()
+
+
+def test_season_refuses_per_flash():
+    season = Season()
+    season.setPerFlashTiming()
+
+    with pytest.raises(ValueError, match='per-flash'):
+        season.getGLMData()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Writer Test File
+
+Purpose: A run with a ResultWriter keeps its counts in day files instead of
+memory. Reading them back must give the same dataframe as a run without a
+writer, a run that stops part way must carry on without writing a scan
+twice, and a directory written by another storm or other settings must be
+refused.
+
+@author: coreywalker
+"""
+
+import glob
+
+import pandas as pd
+import pytest
+
+from class_writer import ResultWriter
+
+
+def test_written_run_matches_in_memory(makeDriver, processFiles, tmp_path):
+    expected = processFiles(makeDriver())
+
+    obj = makeDriver()
+    obj.writer = ResultWriter(str(tmp_path / 'results'))
+    written = processFiles(obj)
+
+    pd.testing.assert_frame_equal(written, expected)
+
+
+def test_use_settings_refuses_another_run(tmp_path):
+    settings = {'track': 'a1', 'geometry': 'degree', 'size': 1, 'radii': None, 'rings': None, 'perFlash': False}
+    writer = ResultWriter(str(tmp_path / 'results'))
+    writer.useSettings(settings)
+    writer.write(pd.Timestamp('2021-05-20 00:00:00'), 30.3, -55.5, 12)
+    writer.flush()
+
+    #the same run carries on
+    ResultWriter(str(tmp_path / 'results')).useSettings(settings)
+
+    for change in [{'track': 'b2'}, {'size': 2}, {'radii': [50, 100]}]:
+        with pytest.raises(ValueError, match='another storm or other settings'):
+            ResultWriter(str(tmp_path / 'results')).useSettings(dict(settings, **change))
+
+
+def test_driver_refuses_another_storm(makeDriver, processFiles, tmp_path):
+    obj = makeDriver()
+    obj.writer = ResultWriter(str(tmp_path / 'results'))
+    processFiles(obj)
+
+    obj = makeDriver((30.30, -55.50, 30.90, -55.00))
+    obj.writer = ResultWriter(str(tmp_path / 'results'))
+    with pytest.raises(ValueError, match='another storm or other settings'):
+        processFiles(obj)
+
+
+def test_resume_writes_no_duplicates(makeDriver, processFiles, tmp_path, countCalls):
+    expected = processFiles(makeDriver())
+
+    obj = makeDriver()
+    obj.writer = ResultWriter(str(tmp_path / 'results'), bufferSize=7)
+    countCalls.crashAfter = 90 + 40
+    with pytest.raises(RuntimeError, match='Stopped'):
+        processFiles(obj)
+    assert len(obj.writer.read()) == 40
+
+    countCalls.crashAfter = None
+    obj = makeDriver()
+    obj.writer = ResultWriter(str(tmp_path / 'results'), bufferSize=7)
+    resumed = processFiles(obj)
+
+    #every scan is in the day files exactly once
+    written = pd.concat([pd.read_csv(fileName) for fileName in glob.glob(str(tmp_path / 'results' / '*.csv'))])
+    assert len(written) == 90
+    assert not written['Time of Scan'].duplicated().any()
+    pd.testing.assert_frame_equal(resumed, expected)